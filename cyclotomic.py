@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+#encoding: utf-8
+
+import math
+
+# The Penrose tiling is drawn by a turtle that only turns by multiples of 36°,
+# thus each vertex is a sum of unit vectors of the form exp(i*k*pi/5).
+# Those vectors are (plus or minus) fifth roots of unity: exp(i*pi/5) = -exp(3*2*i*pi/5),
+# hence any vertex can be written as an integer combination of the fifth roots of unity:
+#     sum( c_k * zeta^k ), with zeta = exp(2*i*pi/5) and k in 0..4
+# Because 1 + zeta + zeta^2 + zeta^3 + zeta^4 = 0, the coefficients are only defined up to a constant,
+# subtracting the last one gives a unique representation, with four integer coefficients.
+# Equality and hashing of vertices are then exact integer operations,
+# and floating point coordinates are only needed to plot or export the points.
+
+# Cartesian coordinates of the fifth roots of unity.
+roots = [ ( math.cos(2*math.pi*k/5), math.sin(2*math.pi*k/5) ) for k in range(5) ]
+
+
+def canonical( coefs ):
+    """Return the unique 4-tuple representation of the given 5 coefficients over the fifth roots of unity."""
+    assert( len(coefs) == 5 )
+    last = coefs[4]
+    return tuple( c - last for c in coefs[:4] )
+
+
+def step( turns ):
+    """Return the 5 coefficients of the unit vector which heading is turns*36°."""
+    # exp(i*pi/5) = -zeta^3, thus exp(i*turns*pi/5) = (-1)^turns * zeta^(3*turns)
+    coefs = [0] * 5
+    if turns % 2 == 0:
+        coefs[ (3*turns) % 5 ] = 1
+    else:
+        coefs[ (3*turns) % 5 ] = -1
+    return coefs
+
+
+def rotate( coefs, turns ):
+    """Return the 5 coefficients of the given vector, rotated by turns*36°."""
+    # Multiplying by zeta^k shifts the coefficients by k, see step.
+    shift = (3*turns) % 5
+    coefs = tuple(coefs)
+    rotated = coefs[5-shift:] + coefs[:5-shift]
+    if turns % 2 == 0:
+        return rotated
+    else:
+        return tuple( -c for c in rotated )
+
+
+def as_float( coefs, unit = 1 ):
+    """Return the (x,y) floating point coordinates of the given coefficients."""
+    x = unit * sum( c * rx for c,(rx,ry) in zip(coefs,roots) )
+    y = unit * sum( c * ry for c,(rx,ry) in zip(coefs,roots) )
+    return x,y
+
+
+class Point(object):
+    """A point with exact coordinates, as integer coefficients over the fifth roots of unity.
+
+    Equality and hashing only consider the integer coefficients.
+    The point also behaves like a (x,y) tuple of floats, scaled by the given unit,
+    so that it can be plotted or exported like any other point."""
+    __slots__ = ('coefs','unit','xy')
+
+    def __init__( self, coefs, unit = 1 ):
+        if len(coefs) == 5:
+            coefs = canonical(coefs)
+        assert( len(coefs) == 4 )
+        self.coefs = tuple(coefs)
+        self.unit = unit
+        # Floating point coordinates, only computed when asked for.
+        self.xy = None
+
+    def __eq__( self, other ):
+        return isinstance(other, Point) and self.coefs == other.coefs
+
+    def __ne__( self, other ):
+        return not self == other
+
+    def __hash__( self ):
+        return hash(self.coefs)
+
+    # Tuple-like API, with floating point coordinates.
+
+    def __len__( self ):
+        return 2
+
+    def __getitem__( self, i ):
+        if self.xy is None:
+            self.xy = as_float( self.coefs, self.unit )
+        return self.xy[i]
+
+    def __iter__( self ):
+        yield self[0]
+        yield self[1]
+
+    def __lt__( self, other ):
+        return tuple(self) < tuple(other)
+
+    def __le__( self, other ):
+        return tuple(self) <= tuple(other)
+
+    def __gt__( self, other ):
+        return tuple(self) > tuple(other)
+
+    def __ge__( self, other ):
+        return tuple(self) >= tuple(other)
+
+    def __repr__( self ):
+        return "(%s, %s)" % tuple(self)
+
+
+def as_floats( segments ):
+    """Return the given segments of points as segments of (x,y) tuples of floats."""
+    return [ tuple( tuple(p) for p in seg ) for seg in segments ]
+
@@ -2,6 +2,15 @@
 
 from __future__ import division 
 import math
+import heapq
+
+import predicates
+
+try:
+    import numpy
+except ImportError:
+    # Only needed for the batched functions.
+    numpy = None
 
 epsilon = 1e-6
 # epsilon = 0
@@ -13,12 +22,73 @@ def y( point ):
     return point[1]
 
 
+class PointSet(object):
+    """A sequence of points, stored as a contiguous (N,2) numpy array of float coordinates.
+
+    This takes 16 bytes per point, instead of about 100 bytes for a tuple of two floats,
+    and allows to compute on all the points at once.
+    For the code that is not aware of it, it behaves like a list of (x,y) tuples:
+    indexing and iterating yield tuples.
+    An (N,2) array of coordinates is used as is, without converting it to tuples nor copying it."""
+    def __init__( self, points = [] ):
+        if isinstance( points, PointSet ):
+            self.coords = points.coords.copy()
+        elif isinstance( points, numpy.ndarray ):
+            self.coords = numpy.asarray( points, dtype=float ).reshape(-1,2)
+        else:
+            self.coords = numpy.array( [ tuple(p) for p in points ], dtype=float ).reshape(-1,2)
+
+    def __len__( self ):
+        return len(self.coords)
+
+    def __getitem__( self, i ):
+        if isinstance( i, slice ):
+            return PointSet( self.coords[i].copy() )
+        px,py = self.coords[i]
+        return float(px),float(py)
+
+    def __iter__( self ):
+        for p in self.coords.tolist():
+            yield tuple(p)
+
+    def __contains__( self, point ):
+        return bool( numpy.any( (self.coords[:,0] == x(point)) & (self.coords[:,1] == y(point)) ) )
+
+    def __repr__( self ):
+        return "PointSet(%s)" % self.tuples()
+
+    def tuples( self ):
+        """Return the list of (x,y) tuples."""
+        return [ tuple(p) for p in self.coords.tolist() ]
+
+    def x( self ):
+        return self.coords[:,0]
+
+    def y( self ):
+        return self.coords[:,1]
+
+    def box( self ):
+        """Return the min and max points of the bounding box enclosing the points."""
+        minx,miny = self.coords.min(axis=0).tolist()
+        maxx,maxy = self.coords.max(axis=0).tolist()
+        return (minx,miny),(maxx,maxy)
+
+    def sorted( self ):
+        """Return the list of (x,y) tuples, sorted on the x-axis, then on the y-axis."""
+        order = numpy.lexsort( (self.coords[:,1],self.coords[:,0]) )
+        return [ tuple(p) for p in self.coords[order].tolist() ]
+
+
 def mid( xy, pa, pb ):
     return ( xy(pa) + xy(pb) ) / 2.0
 
 def middle( pa, pb ):
     return mid(x,pa,pb),mid(y,pa,pb)
 
+def centroid( points ):
+    """Return the barycenter of the given points."""
+    return sum( x(p) for p in points ) / len(points), sum( y(p) for p in points ) / len(points)
+
 
 def euclidian_distance( ci, cj, graph = None):
     return math.sqrt( float( x(ci) - x(cj) )**2 + float( y(ci) - y(cj) )**2 )
@@ -56,10 +126,11 @@ def collinear( p, q, r, e = epsilon ):
     Note: there is a lot of algorithm to test collinearity, the most known involving linear algebra.
     This one has been found in Jonathan Shewchuk's "Lecture Notes on Geometric Robustness".
     It is maybe the most elegant one: just arithmetic on x and y, without ifs, sqrt or risk of divide-by-zero error.
+    It is computed by the orient2d robust predicate, thus with e=0, this is an exact collinearity test.
     """
-    # Without epsilon comparison, this would ends as:
-    # return (x(p)-x(r)) * (y(q)-y(r)) == (x(q)-x(r)) * (y(p)-y(r))
-    return abs((x(p)-x(r)) * (y(q)-y(r)) - (x(q)-x(r)) * (y(p)-y(r))) <= e
+    # Without the robust predicate, this would ends as:
+    # return abs((x(p)-x(r)) * (y(q)-y(r)) - (x(q)-x(r)) * (y(p)-y(r))) <= e
+    return abs( predicates.orient2d(p,q,r) ) <= e
 
 
 def line_intersection( seg0, seg1 ):
@@ -127,6 +198,8 @@ def line_intersection( seg0, seg1 ):
 
 def box( points ):
     """Return the min and max points of the bounding box enclosing the given set of points."""
+    if isinstance( points, PointSet ):
+        return points.box()
     minp = min( [ x(p) for p in points ] ), min( [ y(p) for p in points ] )
     maxp = max( [ x(p) for p in points ] ), max( [ y(p) for p in points ] )
     return minp,maxp
@@ -157,6 +230,307 @@ def segment_intersection( seg0, seg1 ):
             return None
 
 
+def sweep_intersections( segments ):
+    """Return the intersections among the given segments, as a {(i,j):point} dictionary, i<j being indices of segments.
+
+    Use the Bentley-Ottmann sweep line algorithm: a vertical line sweeps the plane from left to right,
+    stopping at the ends of the segments and at the intersections found so far (the events).
+    The segments crossing the line are kept sorted by the ordinate of their crossing point (the status),
+    and only segments that are neighbours in the status can intersect before the next event,
+    thus the complexity is O((n+k) log n) for n segments and k intersections,
+    instead of testing all the pairs.
+    Each pair is tested with segment_intersection, thus the degenerated cases are the same than in line_intersection."""
+
+    # Order the ends of the segments along the sweep.
+    segs = []
+    for seg in segments:
+        p,q = tuple(seg[0]),tuple(seg[1])
+        if q < p:
+            p,q = q,p
+        segs.append( (p,q) )
+
+    starts = {}
+    ends = {}
+    for i,(p,q) in enumerate(segs):
+        starts.setdefault( p, [] ).append( i )
+        ends.setdefault( q, [] ).append( i )
+    events = list( set(starts) | set(ends) )
+    heapq.heapify( events )
+    queued = set( events )
+
+    found = {}
+    status = []
+
+    def at( i, px, py ):
+        """Ordinate of the segment on the sweep line."""
+        (x0,y0),(x1,y1) = segs[i]
+        if x0 == x1:
+            # Vertical segments cross the line on the event point.
+            return min( max( py, y0 ), y1 )
+        return y0 + (px - x0) * (y1 - y0) / (x1 - x0)
+
+    def slope( i ):
+        """Order of the segments just after the sweep line, vertical ones last."""
+        (x0,y0),(x1,y1) = segs[i]
+        return math.atan2( y1 - y0, x1 - x0 )
+
+    def bisect( value, px, py, strict ):
+        """First index in the status of the segment which ordinate is greater (or equal if not strict) than value."""
+        lo,hi = 0,len(status)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            y = at( status[mid], px, py )
+            if y < value or ( strict and y == value ):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def test( i, j ):
+        if i > j:
+            i,j = j,i
+        if (i,j) not in found:
+            point = segment_intersection( segs[i], segs[j] )
+            if point is not None:
+                found[(i,j)] = point
+            return point
+
+    def check( i, j, px, py ):
+        """Add the intersection of the given segments as an event, if it is after the sweep line."""
+        point = test( i, j )
+        if point is not None and point not in queued:
+            if x(point) > px + epsilon or ( x(point) >= px - epsilon and y(point) > py + epsilon ):
+                heapq.heappush( events, point )
+                queued.add( point )
+
+    while events:
+        p = heapq.heappop( events )
+        # Events that are closer than epsilon are the same one.
+        group = [p]
+        while events and x(events[0]) - x(p) <= epsilon and is_null( y(events[0]) - y(p) ):
+            group.append( heapq.heappop(events) )
+        px,py = p
+
+        upper = set( i for e in group for i in starts.get(e,[]) )
+        lower = set( i for e in group for i in ends.get(e,[]) )
+
+        # Segments of the status that pass through the event point.
+        lo = bisect( py - epsilon, px, py, False )
+        hi = bisect( py + epsilon, px, py, True )
+        through = status[lo:hi]
+
+        involved = list( upper | lower | set(through) )
+        for k,i in enumerate(involved):
+            for j in involved[k+1:]:
+                test( i, j )
+
+        # Segments that continue after the event, degenerated ones are never in the status.
+        after = [ i for i in through if i not in lower ]
+        after += [ i for i in upper if i not in lower ]
+        after.sort( key = slope )
+        status[lo:hi] = after
+
+        if after:
+            if lo > 0:
+                check( status[lo-1], after[0], px, py )
+            if lo + len(after) < len(status):
+                check( after[-1], status[lo+len(after)], px, py )
+        elif 0 < lo < len(status):
+            check( status[lo-1], status[lo], px, py )
+
+    return found
+
+
+class PreparedSegments(object):
+    """A fixed set of segments, with their linear equations, bounding boxes and degeneracy flags computed once.
+
+    The segments are given as a (N,2,2) array of [[x0,y0],[x1,y1]] segments (or any sequence of pairs of points).
+    The intersections are computed as in segment_intersection, with the same floating point operations."""
+    def __init__( self, segments = None ):
+        if segments is None:
+            return
+        segments = numpy.asarray( segments, dtype=float ).reshape(-1,2,2)
+        self.p = segments[:,0]
+        self.q = segments[:,1]
+        px,py,qx,qy = self.p[:,0],self.p[:,1],self.q[:,0],self.q[:,1]
+        # Linear equations, as in linear_equation.
+        self.a = py - qy
+        self.b = qx - px
+        self.c = -( px * qy - qx * py )
+        self.point = (px == qx) & (py == qy)
+        self.vertical = (-epsilon <= self.b) & (self.b <= epsilon)
+        # Boxes enlarged by epsilon, as in in_box.
+        self.low  = numpy.minimum( self.p, self.q ) - epsilon
+        self.high = numpy.maximum( self.p, self.q ) + epsilon
+        # The grid of the boxes is built at the first query.
+        self.grid = None
+
+    def __len__( self ):
+        return len(self.p)
+
+    def take( self, indices ):
+        """Return the prepared segments at the given indices, without computing anything again."""
+        taken = PreparedSegments()
+        for k in ("p","q","a","b","c","point","vertical","low","high"):
+            setattr( taken, k, getattr(self,k)[indices] )
+        taken.grid = None
+        return taken
+
+    def cells( self, low, high ):
+        """Return the ranges of the columns and rows of the grid cells overlapped by the given box."""
+        i0,j0 = numpy.floor( (numpy.asarray(low)  - self.origin) / self.width ).astype(int)
+        i1,j1 = numpy.floor( (numpy.asarray(high) - self.origin) / self.width ).astype(int)
+        return range( i0, i1+1 ), range( j0, j1+1 )
+
+    def bucket( self ):
+        """Gather the indices of the segments in the cells of a uniform grid overlapped by their boxes."""
+        # Cells of the size of an average box, so that each box overlaps a few cells.
+        sizes = numpy.max( self.high - self.low, axis=1 )
+        self.width = max( numpy.mean( sizes ), epsilon ) if len(self) > 0 else 1.0
+        self.origin = numpy.min( self.low, axis=0 ) if len(self) > 0 else numpy.zeros(2)
+        self.grid = {}
+        for k in range(len(self)):
+            columns,rows = self.cells( self.low[k], self.high[k] )
+            for i in columns:
+                for j in rows:
+                    self.grid.setdefault( (i,j), [] ).append( k )
+
+    def near( self, segment ):
+        """Return the indices of the segments which boxes overlap the box of the given segment."""
+        (x0,y0),(x1,y1) = segment
+        if self.grid is None:
+            self.bucket()
+        # Only the segments in the cells overlapped by the box of the given segment are candidates.
+        columns,rows = self.cells( (min(x0,x1),min(y0,y1)), (max(x0,x1),max(y0,y1)) )
+        if len(columns) * len(rows) < len(self):
+            candidates = set()
+            for i in columns:
+                for j in rows:
+                    candidates.update( self.grid.get( (i,j), [] ) )
+            candidates = numpy.array( sorted(candidates), dtype=int )
+        else:
+            # A box larger than the grid, it is faster to scan all the segments.
+            candidates = numpy.arange( len(self) )
+        return candidates[
+                  (self.low[candidates,0] <= max(x0,x1)) & (min(x0,x1) <= self.high[candidates,0])
+                & (self.low[candidates,1] <= max(y0,y1)) & (min(y0,y1) <= self.high[candidates,1]) ]
+
+    def intersections( self, segment ):
+        """Return the indices of the segments intersecting the given one, and the (K,2) array of the intersection points."""
+        # The intersection should be in both boxes, thus only the segments with overlapping boxes are tested.
+        near = self.near( segment )
+        query = PreparedSegments( [segment] ).take( numpy.zeros( len(near), dtype=int ) )
+        found,points = prepared_intersections( query, self.take(near) )
+        return near[found], points[found]
+
+    def intersects_any( self, segment ):
+        """Return True if the given segment intersects at least one of the segments."""
+        near = self.near( segment )
+        if len(near) == 0:
+            return False
+        query = PreparedSegments( [segment] ).take( numpy.zeros( len(near), dtype=int ) )
+        found,points = prepared_intersections( query, self.take(near) )
+        return bool( found.any() )
+
+    def intersects_each( self, segments ):
+        """Return an array of booleans telling if each of the given segments intersects at least one of the segments.
+
+        All the pairs of segments which boxes overlap are tested at once, which avoids the cost of a call by segment."""
+        queries = PreparedSegments( segments )
+        near = [ self.near( segment ) for segment in segments ]
+        # Pairs of indices of the given segments and of the segments near them.
+        i0 = numpy.repeat( numpy.arange( len(queries) ), [ len(n) for n in near ] ).astype(int)
+        i1 = numpy.concatenate( near + [numpy.zeros( 0, dtype=int )] ).astype(int)
+        found,points = prepared_intersections( queries.take(i0), self.take(i1) )
+        return numpy.bincount( i0[found], minlength=len(queries) ) > 0
+
+
+def prepared_intersections( segments0, segments1 ):
+    """Return the intersections flags and points of each pair of PreparedSegments of the same length.
+
+    The degenerated cases are handled as in segment_intersection, with the same floating point operations."""
+    p,q,a0,b0,c0 = segments0.p,segments0.q,segments0.a,segments0.b,segments0.c
+    r,s,a1,b1,c1 = segments1.p,segments1.q,segments1.a,segments1.b,segments1.c
+    px,py,qx,qy = p[:,0],p[:,1],q[:,0],q[:,1]
+    rx,ry,sx,sy = r[:,0],r[:,1],s[:,0],s[:,1]
+
+    found = numpy.zeros( len(p), dtype=bool )
+    points = numpy.empty( (len(p),2) )
+    points.fill( numpy.nan )
+    # Pairs for which the case has already been decided.
+    done = numpy.zeros( len(p), dtype=bool )
+
+    def decide( mask, intersects, x, y ):
+        mask = mask & ~done
+        hit = mask & intersects
+        found[hit] = True
+        points[hit,0] = numpy.broadcast_to( x, mask.shape )[hit]
+        points[hit,1] = numpy.broadcast_to( y, mask.shape )[hit]
+        done[mask] = True
+
+    def collinear( ax, ay, bx, by, cx, cy ):
+        return numpy.abs( (ax-cx) * (by-cy) - (bx-cx) * (ay-cy) ) <= epsilon
+
+    with numpy.errstate( divide='ignore', invalid='ignore' ):
+        # Segments degenerated as single points.
+        point0,point1 = segments0.point,segments1.point
+        same = (px == rx) & (py == ry)
+        decide( point0 & point1, same, px, py )
+        decide( point0, collinear( px,py, rx,ry, sx,sy ), px, py )
+        decide( point1, collinear( rx,ry, px,py, qx,qy ), rx, ry )
+
+        # Collinear lines.
+        decide( (a0 == a1) & (b0 == b1) & (c0 == c1), False, 0, 0 )
+
+        # Vertical lines.
+        vertical0,vertical1 = segments0.vertical,segments1.vertical
+        decide( vertical0 & ~vertical1, True, px, (c1 - a1 * px) / b1 )
+        decide( vertical1 & ~vertical0, True, rx, (c0 - a0 * rx) / b0 )
+        decide( vertical0 & vertical1, False, 0, 0 )
+
+        # Generic case, parallel lines have a null determinant.
+        d  = a0 * b1 - b0 * a1
+        dx = c0 * b1 - b0 * c1
+        dy = a0 * c1 - c0 * a1
+        decide( numpy.ones( len(p), dtype=bool ), ~( (-epsilon <= d) & (d <= epsilon) ), dx / d, dy / d )
+
+        # The intersection of the lines should be in the boxes of both segments, as in in_box.
+        for segs in (segments0,segments1):
+            found &= numpy.all( (segs.low <= points) & (points <= segs.high), axis=1 )
+    points[~found] = numpy.nan
+
+    return found, points
+
+
+def segment_intersections( segments0, segments1, pairs = None ):
+    """Return the intersections flags and points of many pairs of segments at once.
+
+    The segments are (N,2,2) arrays of [[x0,y0],[x1,y1]] segments.
+    If pairs is None, every segment of segments0 is tested against every segment of segments1,
+    and the result is a (N0,N1) array of booleans and a (N0,N1,2) array of points.
+    Else, pairs is a (K,2) array of indices in segments0 and segments1,
+    and the result is a (K,) array of booleans and a (K,2) array of points.
+    The points are NaN where there is no intersection.
+
+    The degenerated cases are handled as in segment_intersection, with the same floating point operations,
+    thus both functions give the same results."""
+    if not isinstance( segments0, PreparedSegments ):
+        segments0 = PreparedSegments( segments0 )
+    if not isinstance( segments1, PreparedSegments ):
+        segments1 = PreparedSegments( segments1 )
+    if pairs is None:
+        shape = (len(segments0),len(segments1))
+        i0,i1 = numpy.indices( shape )
+        i0,i1 = i0.ravel(),i1.ravel()
+    else:
+        pairs = numpy.asarray( pairs, dtype=int ).reshape(-1,2)
+        shape = (len(pairs),)
+        i0,i1 = pairs[:,0],pairs[:,1]
+
+    found,points = prepared_intersections( segments0.take(i0), segments1.take(i1) )
+    return found.reshape(shape), points.reshape( shape + (2,) )
+
+
 if __name__ == "__main__":
     import sys
     import random
@@ -186,14 +560,12 @@ if __name__ == "__main__":
             if p0 != p1:
                 segments.append( (p0,p1) )
 
-    seg_inter = []
+    # Intersections between segments with a sweep line, instead of testing all the pairs.
+    seg_inter = sweep_intersections( segments ).values()
     line_inter = []
     for s0 in segments:
         for s1 in segments:
             if s0 != s1:
-                s = segment_intersection( s0, s1 )
-                if s is not None:
-                    seg_inter.append(s)
                 l = line_intersection( s0, s1 )
                 if l is not None:
                     line_inter.append(l)
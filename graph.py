@@ -1,4 +1,6 @@
 
+import math
+import geometry
 from geometry import x,y
 
 def graph_of( segments ):
@@ -45,3 +47,61 @@ def write( graph, stream ):
             stream.write( "%f,%f " % (x(p),y(p)) )
         stream.write("\n")
 
+
+def faces_of( graph ):
+    """Return the list of the bounded faces of the given planar graph,
+    each face being the list of its nodes, in counter-clockwise order.
+
+    The neighbours of each node are sorted by angle, then each directed edge (half-edge) is followed
+    by the next one turning around the face at its left, and each cycle of half-edges is a face.
+    The outer faces (turning clockwise) and the faces without area are not returned."""
+    # The position of each half-edge (node,neighbour) around its node, in counter-clockwise order.
+    around = {}
+    position = {}
+    for node in graph:
+        around[node] = sorted( set(graph[node]), key = lambda n: math.atan2( y(n) - y(node), x(n) - x(node) ) )
+        for i,n in enumerate(around[node]):
+            position[(node,n)] = i
+
+    faces = []
+    visited = set()
+    for start in position:
+        if start in visited:
+            continue
+        face = []
+        u,v = start
+        while (u,v) not in visited:
+            visited.add( (u,v) )
+            face.append( u )
+            # The edge after (u,v) is the one preceding (v,u) around v.
+            neighbours = around[v]
+            u,v = v,neighbours[ position[(v,u)] - 1 ]
+
+        # Twice the signed area, with the shoelace formula.
+        area = sum( x(p) * y(q) - x(q) * y(p) for p,q in zip( face, face[1:] + face[:1] ) )
+        if area > 0:
+            faces.append( face )
+    return faces
+
+
+def faces_graph( faces, vertices = True ):
+    """Return the graph linking the centroids of the faces having a common vertex,
+    or a common edge if vertices is False."""
+    # The faces having a given vertex (or edge).
+    having = {}
+    for i,face in enumerate(faces):
+        if vertices:
+            keys = face
+        else:
+            keys = [ (min(p,q),max(p,q)) for p,q in zip( face, face[1:] + face[:1] ) ]
+        for k in keys:
+            having.setdefault( k, [] ).append( i )
+
+    centers = [ geometry.centroid( face ) for face in faces ]
+    graph = dict( (c,[]) for c in centers )
+    for ids in having.values():
+        for i in ids:
+            for j in ids:
+                if i != j and centers[j] not in graph[centers[i]]:
+                    graph[centers[i]].append( centers[j] )
+    return graph
@@ -1,7 +1,8 @@
 
 import operator
 from utils import LOG,LOGN
-from geometry import x,y,euclidian_distance
+from geometry import x,y,euclidian_distance,PointSet
+import predicates
 
 # Based on the excellent article by Tom Switzer <thomas.switzer@gmail.com>
 # http://tomswitzer.net/2010/12/2d-convex-hulls-chans-algorithm/
@@ -10,10 +11,10 @@ TURN_RIGHT, TURN_NONE, TURN_LEFT = (-1, 0, 1)
 
 def turn(p, q, r):
     """Returns -1, 0, 1 if the sequence of points (p,q,r) forms a right, straight, or left turn."""
-    qr = ( x(q) - x(p) ) * ( y(r) - y(p) )
-    rq = ( x(r) - x(p) ) * ( y(q) - y(p) )
+    # The robust predicate gives the exact sign of:
+    # ( x(q) - x(p) ) * ( y(r) - y(p) ) - ( x(r) - x(p) ) * ( y(q) - y(p) )
     # cmp(x,y) returns -1 if x<y, 0 if x==y, +1 if x>y
-    return cmp( qr - rq, 0)
+    return cmp( predicates.orient2d(p,q,r), 0)
 
 
 def keep_left(hull, point):
@@ -34,7 +35,10 @@ def graham_scan(points):
     """Returns points on convex hull of an array of points in counter clockwise order."""
 
     # Sort from the furthest left point.
-    spots = sorted(points)
+    if isinstance( points, PointSet ):
+        spots = points.sorted()
+    else:
+        spots = sorted(points)
 
     # Browse the hull turning left from the furthest left point,
     # this is thus the lower part of the convex hull.
@@ -1,5 +1,16 @@
+import math
+from array import array
+from itertools import chain
 from collections import deque
 
+import cyclotomic
+
+try:
+    import numpy
+except ImportError:
+    # Only needed to draw with templates.
+    numpy = None
+
 class IndexedGenerator(object):
     """Add a way to get a generator item by its index"""
     def __init__(self, generator):
@@ -15,9 +26,14 @@ class IndexedGenerator(object):
 class LindenmayerSystem(IndexedGenerator):
     """Base virtual class for a Lindenmayer system"""
     def __init__(self, axiom, rules, angle, heading=0):
+        self.axiom = axiom
+        self.rules = rules
         self.angle = angle
         self.heading = heading
         self.states = deque()
+        # Net motions and drawn segments of the expansions, for each (symbol,depth).
+        self.motions = {}
+        self.templates = {}
         self.actions = {
             'F': self.forward,
             '+': self.right,
@@ -38,6 +54,183 @@ class LindenmayerSystem(IndexedGenerator):
             yield axiom
             axiom = reduce(apply, rules, axiom).upper()
 
+    def expand(self, depth):
+        """Lazily yield the symbols of the given depth, one at a time.
+
+        Instead of building the whole string, walk the rewriting tree depth-first,
+        thus the memory is bounded by the depth times the length of the rules.
+        The symbols are the same than the ones of self[depth], which are not cached."""
+        # Stack of iterators on the replacements being expanded,
+        # the i-th one holds symbols that have been rewritten i times.
+        stack = [ iter(self.axiom) ]
+        while stack:
+            for symbol in stack[-1]:
+                if len(stack) > depth:
+                    yield symbol
+                else:
+                    # Symbols without rule are kept as is.
+                    # Like in lindenmayer, the rewritten string is upper case.
+                    stack.append( iter( self.rules.get(symbol,symbol).upper() ) )
+                    break
+            else:
+                # All the symbols at this level have been expanded.
+                stack.pop()
+
+    def rotation(self, turns):
+        """Return the (cos,sin) of the heading after the given number of turns to the left"""
+        rad = math.radians( (self.heading + turns * self.angle) % 360 )
+        return math.cos(rad), math.sin(rad)
+
+    def motion(self, symbol, depth):
+        """Return the (dx,dy,turns,reach) net effect of drawing the symbol after depth rewritings.
+
+        (dx,dy) is the displacement, in number of forward moves, with x along the initial heading (which is
+        considered to be zero) and y on its left. turns is the change of heading, in number of angles, and
+        reach is an upper bound of the distance between the starting point and any drawn point.
+        The brackets of a rule should be balanced."""
+        key = (symbol,depth)
+        if key in self.motions:
+            return self.motions[key]
+
+        if depth == 0 or symbol not in self.rules:
+            # Symbols without rule are kept as is, thus they have the effect of their action.
+            if symbol == 'F':
+                res = (1.0, 0.0, 0, 1.0)
+            elif symbol == '+':
+                res = (0.0, 0.0, -1, 0.0)
+            elif symbol == '-':
+                res = (0.0, 0.0, 1, 0.0)
+            else:
+                res = (0.0, 0.0, 0, 0.0)
+        else:
+            x,y,turns,reach = 0.0,0.0,0,0.0
+            states = []
+            for char in self.rules[symbol].upper():
+                if char == '[':
+                    states.append( (x,y,turns) )
+                elif char == ']':
+                    x,y,turns = states.pop()
+                else:
+                    dx,dy,dt,r = self.motion( char, depth-1 )
+                    reach = max( reach, math.hypot(x,y) + r )
+                    rad = math.radians( turns * self.angle )
+                    c,s = math.cos(rad), math.sin(rad)
+                    x += c*dx - s*dy
+                    y += s*dx + c*dy
+                    turns += dt
+            assert( len(states) == 0 )
+            res = (x, y, turns, reach)
+
+        self.motions[key] = res
+        return res
+
+    def template(self, symbol, depth):
+        """Return the segments drawn by the symbol after depth rewritings, as a (N,4) numpy array of x1,y1,x2,y2.
+
+        The coordinates are in the same frame than the ones of motion, and each segment is drawn only once."""
+        key = (symbol,depth)
+        if key not in self.templates:
+            if depth == 0 or symbol not in self.rules:
+                if symbol == 'F':
+                    res = numpy.array( [[0.0, 0.0, 1.0, 0.0]] )
+                else:
+                    res = numpy.zeros( (0,4) )
+            else:
+                res = self.stamp( self.rules[symbol].upper(), depth-1 )
+            self.templates[key] = res
+        return self.templates[key]
+
+    def stamp(self, string, depth):
+        """Return the segments drawn by the string after depth rewritings, as a (N,4) numpy array of x1,y1,x2,y2.
+
+        Instead of interpreting the expanded symbols, rotated and translated copies
+        of the templates of the symbols of the string are stamped."""
+        x,y,turns = 0.0,0.0,0
+        states = []
+        stamped = []
+        for char in string:
+            if char == '[':
+                states.append( (x,y,turns) )
+            elif char == ']':
+                x,y,turns = states.pop()
+            else:
+                rad = math.radians( turns * self.angle )
+                c,s = math.cos(rad), math.sin(rad)
+                segments = self.template( char, depth )
+                if len(segments):
+                    # Rotate the points, which are the rows of the array, then translate them.
+                    rotation = numpy.array( [[c, s], [-s, c]] )
+                    stamped.append( segments.reshape(-1,2).dot(rotation).reshape(-1,4) + (x,y,x,y) )
+                dx,dy,dt,reach = self.motion( char, depth )
+                x += c*dx - s*dy
+                y += s*dx + c*dy
+                turns += dt
+        if not stamped:
+            return numpy.zeros( (0,4) )
+
+        # Remove the segments drawn several times, in any direction.
+        # The coordinates are compared once rounded far below the final rounding, to merge the same points
+        # obtained with different error propagations, but the kept segments are not rounded.
+        segments = numpy.concatenate(stamped)
+        keys = numpy.round( segments, 12 ) + 0.0
+        reverse = (keys[:,0] > keys[:,2]) | ( (keys[:,0] == keys[:,2]) & (keys[:,1] > keys[:,3]) )
+        keys[reverse] = keys[reverse][:,[2,3,0,1]]
+        uniq,kept = numpy.unique( keys, axis=0, return_index=True )
+        return segments[kept]
+
+    def clipped(self, depth, bbox):
+        """Lazily yield the symbols of the given depth, like expand, but skip the expansions that cannot draw within the bbox.
+
+        The bbox is a ((xmin,ymin),(xmax,ymax)) box, in number of forward moves, the turtle starting at (0,0).
+        A skipped expansion is replaced by a single (symbol,depth) tuple, which should be interpreted as its net motion.
+        Thus the cost depends on the number of symbols drawn in the box, not on the size of the whole figure."""
+        (xmin,ymin),(xmax,ymax) = bbox
+        # The turtle state is followed here, to know where each expansion starts.
+        x,y,turns = 0.0,0.0,0
+        states = []
+        rotations = {}
+        stack = [ iter(self.axiom) ]
+        while stack:
+            for symbol in stack[-1]:
+                remaining = depth - len(stack) + 1
+                if remaining > 0 and symbol in self.rules:
+                    dx,dy,dt,reach = self.motion( symbol, remaining )
+                    # Distance between the starting point and the box.
+                    ox = max( xmin - x, 0, x - xmax )
+                    oy = max( ymin - y, 0, y - ymax )
+                    # The margin accounts for the rounding errors on the cumulated positions.
+                    if math.hypot(ox,oy) > reach * (1 + 1e-9) + 1e-9:
+                        yield (symbol,remaining)
+                        if turns not in rotations:
+                            rotations[turns] = self.rotation(turns)
+                        c,s = rotations[turns]
+                        x += c*dx - s*dy
+                        y += s*dx + c*dy
+                        turns += dt
+                        continue
+                    # Like in lindenmayer, the rewritten string is upper case.
+                    stack.append( iter( self.rules[symbol].upper() ) )
+                    break
+                else:
+                    # Symbols without rule are kept as is, thus they can be interpreted right away.
+                    if symbol == 'F':
+                        if turns not in rotations:
+                            rotations[turns] = self.rotation(turns)
+                        c,s = rotations[turns]
+                        x += c
+                        y += s
+                    elif symbol == '+':
+                        turns -= 1
+                    elif symbol == '-':
+                        turns += 1
+                    elif symbol == '[':
+                        states.append( (x,y,turns) )
+                    elif symbol == ']':
+                        x,y,turns = states.pop()
+                    yield symbol
+            else:
+                stack.pop()
+
     def forward(self):
         raise NotImplementedError
 
@@ -61,12 +254,39 @@ class TurtleLSystem(LindenmayerSystem):
         self.size = size
         super(TurtleLSystem, self).__init__( axiom, rules, angle, heading )
 
-    def draw(self, depth):        
+    def draw(self, depth, lazy=False, bbox=None):
+        """Draw the L-System at the given depth.
+
+        If lazy is True, the symbols are expanded one at a time instead of building the whole string.
+        If a ((xmin,ymin),(xmax,ymax)) bbox is given, the expansions that cannot draw within it are skipped
+        (the symbols are then always expanded lazily)."""
         self.turtle.setheading(self.heading)
 
-        for char in self[depth]:
+        if bbox:
+            (xmin,ymin),(xmax,ymax) = bbox
+            s = float(self.size)
+            symbols = self.clipped( depth, ( (xmin/s,ymin/s), (xmax/s,ymax/s) ) )
+        elif lazy:
+            symbols = self.expand(depth)
+        else:
+            symbols = self[depth]
+
+        for char in symbols:
             if char in self.actions:
                 self.actions[char]()
+            elif type(char) is tuple:
+                self.jump( *char )
+
+    def jump(self, symbol, depth):
+        """Move the turtle as the expansion of the symbol would do, without drawing"""
+        dx,dy,turns,reach = self.motion( symbol, depth )
+        rad = math.radians( self.turtle.heading() )
+        c,s = math.cos(rad), math.sin(rad)
+        self.turtle.up()
+        self.turtle.setx( self.turtle.xcor() + self.size * (c*dx - s*dy) )
+        self.turtle.sety( self.turtle.ycor() + self.size * (s*dx + c*dy) )
+        self.turtle.left( turns * self.angle )
+        self.turtle.down()
 
     def forward(self):
         self.turtle.forward(self.size)
@@ -92,11 +312,165 @@ class TurtleLSystem(LindenmayerSystem):
         self.turtle.down()
 
 
-class DumpTurtleLSystem(TurtleLSystem):
+def overlaps( segment, bbox ):
+    """True if the bounding box of the segment overlaps the ((xmin,ymin),(xmax,ymax)) bbox"""
+    (x1,y1),(x2,y2) = segment
+    (xmin,ymin),(xmax,ymax) = bbox
+    return min(x1,x2) <= xmax and max(x1,x2) >= xmin and min(y1,y2) <= ymax and max(y1,y2) >= ymin
+
+
+def unique_exact( segments ):
+    """Return the (N,2,5) numpy array of cyclotomic coefficients of the given segments,
+    made canonical and without the segments that are duplicated, in any direction."""
+    segments = segments - segments[:,:,4:]
+    # Order the ends of each segment on their first different coefficient.
+    diff = segments[:,0] - segments[:,1]
+    first = numpy.argmax( diff != 0, axis=1 )
+    reverse = diff[ numpy.arange(len(diff)), first ] > 0
+    segments[reverse] = segments[reverse][:,::-1]
+    return numpy.unique( segments.reshape(-1,10), axis=0 ).reshape(-1,2,5)
+
+
+class SegmentStore(object):
+    """A set of undirected segments, stored as pairs of integer vertex ids.
+
+    Each vertex is given an id the first time it is seen, its coordinates are appended to a single array of floats.
+    Each segment is stored as its (smallest id, largest id) pair, in an array of integers,
+    thus a segment and its reversed clone are the same.
+    The duplicated segments are removed in a single pass before the store is read,
+    and the index of the vertices is then dropped: it is only needed to add segments and is built again if so.
+    Iterating over the store yields (start,end) tuples of vertices, like a set of segments would."""
+    def __init__(self, segments = []):
+        # Vertex key to id.
+        self.ids = {}
+        # Vertices which are not pairs of floats (like cyclotomic.Point), by id.
+        self.objects = {}
+        # Consecutive x,y coordinates of the vertices.
+        self.coords = array('d')
+        # Consecutive ids of the segments ends.
+        self.edges = array('l')
+        # Number of ids at the beginning of the edges array that are known to be without duplicates.
+        self.unique = 0
+        for start,end in segments:
+            self.add( start, end )
+        self.compact()
+
+    def key_of(self, point):
+        """Return the key of the given vertex in the index"""
+        # A pair of floats is indexed as a complex number, which is much smaller than a tuple of two floats.
+        if type(point) is tuple:
+            return complex( *point )
+        else:
+            return point
+
+    def index(self):
+        """Return the dictionary of the ids of the vertices keys"""
+        if self.ids is None:
+            return dict( (self.key_of(p),i) for i,p in enumerate(self.vertices()) )
+        return self.ids
+
+    def id_of(self, point):
+        """Return the id of the given vertex, add it if it is not already known"""
+        if self.ids is None:
+            self.ids = self.index()
+        key = self.key_of(point)
+        i = self.ids.get(key)
+        if i is None:
+            i = len(self.coords) // 2
+            self.ids[key] = i
+            if type(point) is not tuple:
+                self.objects[i] = point
+            self.coords.append( point[0] )
+            self.coords.append( point[1] )
+        return i
+
+    def add(self, start, end):
+        """Add the segment, its duplicates are removed at the next reading of the store"""
+        i,j = self.id_of(start), self.id_of(end)
+        if i > j:
+            i,j = j,i
+        self.edges.append(i)
+        self.edges.append(j)
+
+    def compact(self):
+        """Remove the duplicated segments, keeping the first occurrence of each one, and drop the index of the vertices"""
+        self.ids = None
+        if self.unique == len(self.edges):
+            return
+        edges = self.edges
+        unique = array('l')
+        # Each pair of ids as a single integer, for the constant time search of duplicates.
+        seen = set()
+        for n in xrange( 0, len(edges), 2 ):
+            k = (edges[n] << 32) | edges[n+1]
+            if k not in seen:
+                seen.add(k)
+                unique.append( edges[n] )
+                unique.append( edges[n+1] )
+        self.edges = unique
+        self.unique = len(unique)
+
+    def vertices(self):
+        """Return the list of the vertices, in the order of their ids"""
+        coords = self.coords
+        objects = self.objects
+        return [ objects[i] if i in objects else ( coords[2*i], coords[2*i+1] ) for i in xrange( len(coords) // 2 ) ]
+
+    def __contains__(self, segment):
+        ids = self.index()
+        start,end = [ ids.get( self.key_of(p) ) for p in segment ]
+        if start is None or end is None:
+            return False
+        if start > end:
+            start,end = end,start
+        self.compact()
+        edges = self.edges
+        # There is no index of the segments, thus this is in linear time.
+        return any( edges[n] == start and edges[n+1] == end for n in xrange( 0, len(edges), 2 ) )
+
+    def __len__(self):
+        self.compact()
+        return len(self.edges) // 2
+
+    def __iter__(self):
+        self.compact()
+        points = self.vertices()
+        edges = self.edges
+        for n in xrange( 0, len(edges), 2 ):
+            yield points[edges[n]], points[edges[n+1]]
+
+    def as_arrays(self):
+        """Return the (N,2) numpy array of vertices coordinates and the (M,2) numpy array of segments ids"""
+        import numpy
+        self.compact()
+        # Copies: the buffers of the arrays may be moved by the next insertions.
+        coords = numpy.frombuffer( self.coords, dtype=float ).reshape(-1,2).copy()
+        edges = numpy.frombuffer( self.edges, dtype=numpy.dtype('l') ).reshape(-1,2).copy()
+        return coords, edges
+
+
+class DumpSegments(object):
+    """Mixin for L-Systems that keep their drawn segments in a SegmentStore"""
+
+    def clean(self):
+        """Remove the segments that have duplicated clones, in the same or the reverse direction."""
+        self.segments.compact()
+
+    def __str__(self):
+        dump = ""
+        for segment in self.segments:
+            for coords in segment:
+                for x in coords:
+                    dump += str(x)+" "
+            dump += "\n"
+        return dump
+
+
+class DumpTurtleLSystem(DumpSegments, TurtleLSystem):
     """Keep the set of uniques L-System segments drawn by the Turtle"""
     def __init__(self, turtle, axiom, rules, angle, heading=0, size=1, rounding=10):
-        # using a set avoid duplicate segments
-        self.segments = set()
+        # using a store avoid duplicate segments, in both directions
+        self.segments = SegmentStore()
         # nb of significant digits for rounding
         self.rounding=10
         super(DumpTurtleLSystem, self).__init__( turtle, axiom, rules, angle, heading, size )
@@ -112,30 +486,283 @@ class DumpTurtleLSystem(TurtleLSystem):
         x2 = round( self.turtle.xcor(), self.rounding )
         y2 = round( self.turtle.ycor(), self.rounding )
         end = ( x2, y2 )
-        self.segments.add( (start,end) )
+        self.segments.add( start, end )
 
-    def draw(self, depth):
+    def draw(self, depth, lazy=False, bbox=None):
         """Call the draw function, then clean the data"""
-        super(DumpTurtleLSystem, self).draw(depth)
+        super(DumpTurtleLSystem, self).draw(depth, lazy, bbox)
         self.clean()
 
-    def clean(self):
-        """Remove segments that have duplicated clones in the reverse direction 
-           (the segments is a set, that guarantees that no other clone exists)"""
-        for segment in self.segments:
-            for start,end in segment:
-                # FIXME surely faster to catch the exception than to do two search?
-                if (end,start) in self.segments:
-                    self.segments.remove( (end,start) )
 
-    def __str__(self):
-        dump = ""
-        for segment in self.segments:
-            for coords in segment:
-                for x in coords:
-                    dump += str(x)+" "
-            dump += "\n"
-        return dump
+class HeadlessLSystem(DumpSegments, LindenmayerSystem):
+    """Keep the set of uniques L-System segments, without using the Turtle module.
+
+    The turtle state (position, heading and stack of saved states) is handled here,
+    thus there is no need for a display and it is way faster.
+    The resulting segments are the same than the ones of DumpTurtleLSystem,
+    except that the heading is not subject to the error propagation of the Turtle
+    (which rotates its orientation vector at each turn), and thus that there is less
+    nodes duplicated with slightly different coordinates.
+
+    If exact is True, the angles must be multiples of 36 degrees and the vertices are
+    cyclotomic.Point with exact integer coordinates, instead of rounded floats."""
+    def __init__(self, axiom, rules, angle, heading=0, size=1, rounding=10, exact=False):
+        self.size = size
+        self.rounding = rounding
+        self.exact = exact
+        if exact:
+            assert( angle % 36 == 0 and heading % 36 == 0 )
+        # Coordinates of the drawn segments, as consecutive x1,y1,x2,y2 floats.
+        self.coords = array('d')
+        self.segments = SegmentStore()
+        super(HeadlessLSystem, self).__init__( axiom, rules, angle, heading )
+
+    def move(self, turns):
+        """Return the (dx,dy) forward move after the given number of turns to the left"""
+        c,s = self.rotation(turns)
+        return self.size * c, self.size * s
+
+    def walk(self, symbols):
+        """Interpret the symbols in a single pass and yield the (x1,y1,x2,y2) coordinates of each drawn segment"""
+        # The turtle state is held in local variables, which is much faster than attributes.
+        # The heading is the number of turns since the initial heading:
+        # turns are summed up and the trigonometry is only computed when moving forward.
+        x,y,turns = 0.0,0.0,0
+        states = self.states
+        # Forward moves for each encountered heading.
+        moves = {}
+        for char in symbols:
+            if char == 'F':
+                if turns not in moves:
+                    moves[turns] = self.move(turns)
+                dx,dy = moves[turns]
+                yield x, y, x+dx, y+dy
+                x += dx
+                y += dy
+            elif char == '+':
+                turns -= 1
+            elif char == '-':
+                turns += 1
+            elif char == '[':
+                states.append( (x, y, turns) )
+            elif char == ']':
+                x,y,turns = states.pop()
+            elif type(char) is tuple:
+                # A skipped expansion, which only moves the turtle.
+                dx,dy,dt,reach = self.motion( *char )
+                if turns not in moves:
+                    moves[turns] = self.move(turns)
+                c,s = moves[turns]
+                x += c*dx - s*dy
+                y += s*dx + c*dy
+                turns += dt
+
+    def walk_exact(self, symbols):
+        """Interpret the symbols and yield the (start,end) cyclotomic coefficients of each drawn segment"""
+        # Same as walk, but the position is made of the 5 integer coefficients over the fifth roots of unity.
+        a,b,c,d,e,turns = 0,0,0,0,0,0
+        states = self.states
+        moves = {}
+        for char in symbols:
+            if char == 'F':
+                if turns not in moves:
+                    # The heading is a number of turns of 36 degrees.
+                    moves[turns] = cyclotomic.step( (self.heading + turns * self.angle) // 36 )
+                da,db,dc,dd,de = moves[turns]
+                start = (a,b,c,d,e)
+                a += da
+                b += db
+                c += dc
+                d += dd
+                e += de
+                yield start, (a,b,c,d,e)
+            elif char == '+':
+                turns -= 1
+            elif char == '-':
+                turns += 1
+            elif char == '[':
+                states.append( (a,b,c,d,e,turns) )
+            elif char == ']':
+                a,b,c,d,e,turns = states.pop()
+            elif type(char) is tuple:
+                # A skipped expansion, which only moves the turtle.
+                coefs,dt = self.exact_motion( *char )
+                da,db,dc,dd,de = cyclotomic.rotate( coefs, (self.heading + turns * self.angle) // 36 )
+                a += da
+                b += db
+                c += dc
+                d += dd
+                e += de
+                turns += dt
+
+    def exact_motion(self, symbol, depth):
+        """Return the (coefficients,turns) net effect of drawing the symbol after depth rewritings,
+        the displacement being given as the 5 coefficients over the fifth roots of unity, for a zero initial heading."""
+        key = ('exact',symbol,depth)
+        if key in self.motions:
+            return self.motions[key]
+
+        if depth == 0 or symbol not in self.rules:
+            if symbol == 'F':
+                res = ( tuple(cyclotomic.step(0)), 0 )
+            elif symbol == '+':
+                res = ( (0,0,0,0,0), -1 )
+            elif symbol == '-':
+                res = ( (0,0,0,0,0), 1 )
+            else:
+                res = ( (0,0,0,0,0), 0 )
+        else:
+            coefs,turns = (0,0,0,0,0),0
+            states = []
+            for char in self.rules[symbol].upper():
+                if char == '[':
+                    states.append( (coefs,turns) )
+                elif char == ']':
+                    coefs,turns = states.pop()
+                else:
+                    dcoefs,dt = self.exact_motion( char, depth-1 )
+                    dcoefs = cyclotomic.rotate( dcoefs, turns * self.angle // 36 )
+                    coefs = tuple( c + dc for c,dc in zip(coefs,dcoefs) )
+                    turns += dt
+            res = (coefs, turns)
+
+        self.motions[key] = res
+        return res
+
+    def exact_template(self, symbol, depth):
+        """Return the segments drawn by the symbol after depth rewritings, as a (N,2,5) numpy array
+        of the canonical cyclotomic coefficients of their ends, for a zero initial heading."""
+        key = ('exact',symbol,depth)
+        if key not in self.templates:
+            if depth == 0 or symbol not in self.rules:
+                if symbol == 'F':
+                    res = numpy.array( [[ (0,0,0,0,0), cyclotomic.step(0) ]] )
+                    res -= res[:,:,4:]
+                else:
+                    res = numpy.zeros( (0,2,5), dtype=int )
+            else:
+                res = self.exact_stamp( self.rules[symbol].upper(), depth-1 )
+            self.templates[key] = res
+        return self.templates[key]
+
+    def exact_stamp(self, string, depth, heading=0):
+        """Return the segments drawn by the string after depth rewritings, as a (N,2,5) numpy array
+        of the canonical cyclotomic coefficients of their ends.
+
+        Like stamp, but the rotations are exact permutations of the coefficients."""
+        coefs,turns = numpy.zeros( 5, dtype=int ),0
+        states = []
+        stamped = []
+        for char in string:
+            if char == '[':
+                states.append( (coefs,turns) )
+            elif char == ']':
+                coefs,turns = states.pop()
+            else:
+                rotation = ( heading + turns * self.angle ) // 36
+                segments = self.exact_template( char, depth )
+                if len(segments):
+                    # See cyclotomic.rotate.
+                    rotated = numpy.roll( segments, (3*rotation) % 5, axis=2 )
+                    if rotation % 2:
+                        rotated = -rotated
+                    stamped.append( rotated + coefs )
+                dcoefs,dt = self.exact_motion( char, depth )
+                coefs = coefs + cyclotomic.rotate( dcoefs, rotation )
+                turns += dt
+        if not stamped:
+            return numpy.zeros( (0,2,5), dtype=int )
+
+        return unique_exact( numpy.concatenate(stamped) )
+
+    def draw(self, depth, lazy=False, bbox=None, stamped=False):
+        """Interpret the symbols, then build the set of segments.
+
+        If lazy is True, the symbols are expanded one at a time and the drawn coordinates are not stored,
+        else the whole string is built and the coordinates are written in self.coords.
+        If a ((xmin,ymin),(xmax,ymax)) bbox is given, only the segments which bounding box overlaps it are kept,
+        and the expansions that cannot draw within it are skipped (the symbols are then always expanded lazily).
+        If stamped is True, the symbols are not interpreted, but the cached templates of their expansions
+        are stamped with numpy (see LindenmayerSystem.stamp)."""
+        if stamped:
+            if self.exact:
+                segments = self.exact_stamp( self.axiom, depth, self.heading )
+                drawn = ( ( tuple(start),tuple(end) ) for start,end in segments.tolist() )
+                self.segments = self.exact_segments_of( drawn )
+            else:
+                segments = self.stamp( self.axiom, depth )
+                # The templates are drawn for a zero heading.
+                rad = math.radians( self.heading )
+                c,s = math.cos(rad), math.sin(rad)
+                rotation = numpy.array( [[c, s], [-s, c]] )
+                segments = segments.reshape(-1,2).dot(rotation).reshape(-1,4) * self.size
+                self.segments = self.segments_of( map( tuple, segments.tolist() ) )
+            if bbox:
+                self.segments = SegmentStore( seg for seg in self.segments if overlaps( seg, bbox ) )
+            self.clean()
+            return
+
+        if bbox:
+            (xmin,ymin),(xmax,ymax) = bbox
+            s = float(self.size)
+            symbols = self.clipped( depth, ( (xmin/s,ymin/s), (xmax/s,ymax/s) ) )
+        elif lazy:
+            symbols = self.expand(depth)
+        else:
+            symbols = None
+
+        if self.exact:
+            if symbols is None:
+                symbols = self.symbols(depth)
+            drawn = self.walk_exact( symbols )
+            self.segments = self.exact_segments_of( drawn )
+            if bbox:
+                self.segments = SegmentStore( seg for seg in self.segments if overlaps( seg, bbox ) )
+            self.clean()
+            return
+
+        if symbols is not None:
+            drawn = self.walk( symbols )
+            if bbox:
+                drawn = ( seg for seg in drawn if overlaps( (seg[:2],seg[2:]), bbox ) )
+        else:
+            # Only keep the coordinates of this drawing, not the ones of the previous calls.
+            self.coords = array('d')
+            coords = self.coords
+            coords.extend( chain.from_iterable( self.walk( self.symbols(depth) ) ) )
+            drawn = zip( coords[0::4], coords[1::4], coords[2::4], coords[3::4] )
+
+        self.segments = self.segments_of( drawn )
+        self.clean()
+
+    def symbols(self, depth):
+        """Return the string of the given depth, without the symbols that have no action"""
+        string = self[depth]
+        # Most of the symbols are only useful for the rewriting, not for the drawing:
+        # filtering them out beforehand is much faster than doing it in the loop.
+        ignored = "".join( set(string) - set(self.actions) )
+        return string.translate( None, ignored )
+
+    def segments_of(self, drawn):
+        """Return the SegmentStore of rounded segments from the given (x1,y1,x2,y2) coordinates"""
+        # without rounding, there may be the same node with different coordinates, 
+        # because of error propagation.
+        # The same segments are drawn many times with the very same coordinates,
+        # thus remove duplicates and round each distinct value only once.
+        drawn = set( drawn )
+        rounded = dict( (v, round(v,self.rounding)) for v in set( chain.from_iterable(drawn) ) )
+        return SegmentStore( ( (rounded[x1],rounded[y1]), (rounded[x2],rounded[y2]) ) for x1,y1,x2,y2 in drawn )
+
+    def exact_segments_of(self, drawn):
+        """Return the SegmentStore of cyclotomic.Point from the given (start,end) coefficients"""
+        drawn = set( drawn )
+        # Build a single Point instance for each vertex.
+        points = {}
+        for start,end in drawn:
+            for coefs in (start,end):
+                if coefs not in points:
+                    points[coefs] = cyclotomic.Point( coefs, self.size )
+        return SegmentStore( ( points[start], points[end] ) for start,end in drawn )
 
 
 
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+#encoding: utf-8
+
+import math
+import numpy
+
+import lindenmayer
+import cyclotomic
+
+# A Penrose tiling (type P3) is made of thin and thick rhombi,
+# each rhombus being cut along one of its diagonals into two Robinson triangles.
+# A Robinson triangle (kind,A,B,C) has its apex in A, its two legs AB and AC are edges of the tiling,
+# and its base BC is the diagonal shared with the other half of the rhombus.
+# Deflating a triangle cuts it into smaller Robinson triangles, which legs are shorter by a factor phi:
+# the tiling is thus built by repeatedly deflating the triangles and scaling them up,
+# so that the edges keep the same length.
+# At each generation, the halves of rhombi cut by the border are completed,
+# so that the patch covers the same region than the L-system at the same depth.
+# Rather than the L-system, which draws each segment many times, one generation of triangles
+# is deflated at once, as operations on arrays of complex numbers.
+
+THIN,THICK = 0,1
+
+# The Lindenmayer system which draws the same tiling, segment by segment.
+axiom = "[X]++[X]++[X]++[X]++[X]"
+rules = {
+    'F': "",
+    'W': "YF++ZF----XF[-YF----WF]++",
+    'X': "+YF--ZF[---WF--XF]+",
+    'Y': "-WF++XF[+++YF++ZF]-",
+    'Z': "--YF++++WF[+ZF++++XF]--XF"
+}
+# The axiom draws five times the same branch, rotated by 72°.
+branch = "[X]"
+
+golden_ratio = (1 + math.sqrt(5)) / 2
+
+
+def sun( size = 1, heading = 0 ):
+    """Return the triangles of the five thick rhombi around the origin,
+    that is the same tiling than the L-system at depth 1.
+
+    The triangles are a (kinds,A,B,C) tuple of arrays, kinds being THIN or THICK and A,B,C complex coordinates."""
+    k = numpy.repeat( numpy.arange(5), 2 )
+    side = numpy.tile( [1,-1], 5 )
+    angles = numpy.radians( heading ) + 2 * math.pi * k / 5
+    A = size * numpy.exp( 1j * ( angles + side * math.pi / 5 ) )
+    B = numpy.zeros( 10, dtype=complex )
+    C = size * golden_ratio * numpy.exp( 1j * angles )
+    kinds = numpy.repeat( THICK, 10 )
+    return kinds,A,B,C
+
+
+def deflate( triangles ):
+    """Cut each triangle into smaller Robinson triangles and scale them up by phi,
+    so that the edges keep the same length."""
+    kinds,A,B,C = triangles
+    thick = kinds == THICK
+    thin = ~thick
+
+    # A thick triangle gives two thick triangles and a thin one.
+    # The order of the vertices gives the orientation of the triangles,
+    # which tells how they are cut at the next generation.
+    tA,tB,tC = A[thick],B[thick],C[thick]
+    D = tC + (tB - tC) / golden_ratio
+    G = tC + (tA - tC) / golden_ratio
+    nA = [ D, D, G ]
+    nB = [ tA, tA, tC ]
+    nC = [ tB, G, D ]
+    nk = [ THICK, THIN, THICK ]
+
+    # A thin triangle gives a thick triangle and a thin one.
+    tA,tB,tC = A[thin],B[thin],C[thin]
+    D = tA + (tC - tA) / golden_ratio
+    nA += [ tB, D ]
+    nB += [ tC, tA ]
+    nC += [ D, tB ]
+    nk += [ THIN, THICK ]
+
+    kinds = numpy.concatenate( [ numpy.repeat(k,len(a)) for k,a in zip(nk,nA) ] )
+    A = numpy.concatenate( nA ) * golden_ratio
+    B = numpy.concatenate( nB ) * golden_ratio
+    C = numpy.concatenate( nC ) * golden_ratio
+    return kinds,A,B,C
+
+
+def rounded( z, rounding ):
+    """Return a (N,2) array of the rounded coordinates of the given complex numbers."""
+    # Adding zero avoids having both -0.0 and 0.0.
+    return numpy.round( numpy.column_stack( (z.real,z.imag) ), rounding ) + 0.0
+
+
+def bases( triangles, rounding = 10 ):
+    """Return an array of ids, identical for the triangles that share the same base."""
+    kinds,A,B,C = triangles
+    # The middle of the base is unique for each rhombus.
+    middles = rounded( (B + C) / 2, rounding )
+    uniq,ids = numpy.unique( middles, axis=0, return_inverse=True )
+    return ids.ravel()
+
+
+def complete( triangles, rounding = 10 ):
+    """Add the missing half of the rhombi that have been cut by the deflation on the border of the tiling."""
+    kinds,A,B,C = triangles
+    ids = bases( triangles, rounding )
+    alone = numpy.bincount( ids )[ids] == 1
+    # The missing half is the mirror of the triangle along its base.
+    return ( numpy.concatenate( (kinds, kinds[alone]) ),
+             numpy.concatenate( (A, B[alone] + C[alone] - A[alone]) ),
+             numpy.concatenate( (B, B[alone]) ),
+             numpy.concatenate( (C, C[alone]) ) )
+
+
+def triangles_of( depth, size = 1, heading = 0, rounding = 10 ):
+    """Return the Robinson triangles of the tiling at the given depth, as a (kinds,A,B,C) tuple of arrays."""
+    assert( depth >= 1 )
+    triangles = sun( size, heading )
+    for i in xrange( depth - 1 ):
+        # Completing the border halves before deflating them grows the patch as the L-system does.
+        triangles = complete( deflate( triangles ), rounding )
+    return triangles
+
+
+def segments_of( triangles, rounding = 10 ):
+    """Return the lindenmayer.SegmentStore of unique rounded segments that are the legs of the given triangles."""
+    kinds,A,B,C = triangles
+    starts = rounded( numpy.concatenate( (A,A) ), rounding )
+    ends   = rounded( numpy.concatenate( (B,C) ), rounding )
+    # Sort the ends of each segment, so that segments drawn in both directions are the same.
+    reverse = (starts[:,0] > ends[:,0]) | ( (starts[:,0] == ends[:,0]) & (starts[:,1] > ends[:,1]) )
+    starts[reverse],ends[reverse] = ends[reverse],starts[reverse].copy()
+    segments = numpy.unique( numpy.hstack( (starts,ends) ), axis=0 )
+    return lindenmayer.SegmentStore( ( (x1,y1),(x2,y2) ) for x1,y1,x2,y2 in segments.tolist() )
+
+
+def rhombi_of( triangles, rounding = 10 ):
+    """Return the list of (kind,(p1,p2,p3,p4)) rhombi made of the pairs of triangles sharing the same base."""
+    kinds,A,B,C = triangles
+    ids = bases( triangles, rounding )
+    order = numpy.argsort( ids, kind="mergesort" )
+    # After completion, each base is shared by exactly two triangles.
+    first,second = order[0::2],order[1::2]
+    assert( numpy.all( ids[first] == ids[second] ) )
+    corners = [ rounded(A[first],rounding), rounded(B[first],rounding), rounded(A[second],rounding), rounded(C[first],rounding) ]
+    return [ ( kind, tuple( tuple(p) for p in points ) )
+             for kind,points in zip( kinds[first].tolist(), zip( *[ c.tolist() for c in corners ] ) ) ]
+
+
+def lsystem( axiom = axiom, size = 1, rounding = 10, exact = False ):
+    """Return the headless Lindenmayer system which draws the tiling from the given axiom."""
+    return lindenmayer.HeadlessLSystem( axiom=axiom, rules=rules, angle=36, heading=0, size=size, rounding=rounding, exact=exact )
+
+
+def symmetric( depth, size = 1, rounding = 10, exact = False, lazy = False, stamped = False ):
+    """Return the segments drawn by the Lindenmayer system at the given depth, in a lindenmayer.SegmentStore.
+
+    Only one of the five branches of the axiom is expanded and drawn, with exact coordinates.
+    The four other ones are rotated copies: rotating by 72° multiplies by the fifth root of unity,
+    which shifts the coefficients of the vertices (see cyclotomic), thus the shared vertices are merged exactly.
+    If exact is False, the vertices are rounded floats, else cyclotomic.Point."""
+    one = lsystem( branch, size, rounding, exact = True )
+    one.draw( depth, lazy = lazy, stamped = stamped )
+
+    coords,edges = one.segments.as_arrays()
+    ends = numpy.zeros( (len(edges),2,5), dtype=int )
+    ends[:,:,:4] = numpy.array( [ p.coefs for p in one.segments.vertices() ], dtype=int ).reshape(-1,4)[edges]
+    rotated = numpy.concatenate( [ numpy.roll( ends, k, axis=2 ) for k in range(5) ] )
+    segments = lindenmayer.unique_exact( rotated )
+
+    if exact:
+        points = {}
+        for coefs in set( tuple(c) for c in segments[:,:,:4].reshape(-1,4).tolist() ):
+            points[coefs] = cyclotomic.Point( coefs, size )
+        return lindenmayer.SegmentStore( ( points[tuple(start[:4])], points[tuple(end[:4])] ) for start,end in segments.tolist() )
+    else:
+        xy = segments.dot( numpy.array( cyclotomic.roots ) ) * size
+        xy = numpy.round( xy, rounding ) + 0.0
+        return lindenmayer.SegmentStore( ( (x1,y1),(x2,y2) ) for (x1,y1),(x2,y2) in xy.tolist() )
+
+
+def tiling( depth, size = 1, heading = 0, rounding = 10, triangles = False, rhombi = False ):
+    """Return the segments of the Penrose tiling at the given depth, in a lindenmayer.SegmentStore.
+
+    The segments have the same form than the ones of the L-system: ((x1,y1),(x2,y2)) tuples of rounded floats.
+    If triangles (or rhombi) is True, also return the Robinson triangles (or the rhombi) of the tiling."""
+    tri = triangles_of( depth, size, heading, rounding )
+    res = [ segments_of( tri, rounding ) ]
+    if triangles:
+        res.append( tri )
+    if rhombi:
+        res.append( rhombi_of( tri, rounding ) )
+    if len(res) == 1:
+        return res[0]
+    else:
+        return tuple(res)
+
+
+if __name__=="__main__":
+    import sys
+
+    depth = 1
+    if len(sys.argv) > 1:
+        depth = int( sys.argv[1] )
+
+    segments,rhombi = tiling( depth, size = 10, rhombi = True )
+    print len(segments),"segments",len(rhombi),"rhombi"
@@ -1,4 +1,4 @@
-import lindenmayer
+import penrose
 import tsplib
 import sys
 
@@ -9,25 +9,8 @@ if len(sys.argv) > 1:
 segment_size = 10
 float_rounding = 10
 
-import turtle
-ttl = turtle.Turtle()
-ttl.speed('fastest')
-penrose = lindenmayer.DumpTurtleLSystem(ttl, 
-        axiom="[X]++[X]++[X]++[X]++[X]", 
-        rules={
-            'F': "",
-            'W': "YF++ZF----XF[-YF----WF]++",
-            'X': "+YF--ZF[---WF--XF]+",
-            'Y': "-WF++XF[+++YF++ZF]-",
-            'Z': "--YF++++WF[+ZF++++XF]--XF"
-        }, 
-        angle=36, heading=0, size=segment_size, rounding=float_rounding )
+# Only draw one of the five symmetric branches of the L-system, and rotate it.
+segments = penrose.symmetric( depth, size=segment_size, rounding=float_rounding )
 
-penrose.draw( depth )
-#print penrose
-
-#plot_segments( penrose.segments )
-
-
-tsplib.write_segments( penrose.segments, segment_size, depth, float_rounding, fd=sys.stdout )
+tsplib.write_segments( segments, segment_size, depth, float_rounding, fd=sys.stdout )
 
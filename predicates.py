@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+#encoding: utf-8
+
+import sys
+from fractions import Fraction
+
+# Robust geometric predicates, in the style of Jonathan Shewchuk's
+# "Adaptive Precision Floating-Point Arithmetic and Fast Robust Geometric Predicates".
+#
+# Each predicate is a determinant, whose sign tells on which side of a line (or circle) a point lies.
+# The determinant is first computed with floats, which is fast, along with a bound on its rounding error.
+# If the determinant is larger than the error bound, its sign is right.
+# Else, the points are nearly collinear (or cocircular) and the determinant is computed again,
+# with exact rational arithmetic on the very same floats.
+# Unlike Shewchuk's code, there is no intermediate adaptive stage: this is the uncommon case.
+
+# Half the distance between 1 and the next float.
+epsilon = sys.float_info.epsilon / 2
+
+# Relative error bounds of the floating point determinants.
+ccwerrbound = (3 + 16 * epsilon) * epsilon
+iccerrbound = (10 + 96 * epsilon) * epsilon
+
+
+def orient2d_exact( pa, pb, pc ):
+    ax,ay = Fraction(pa[0]),Fraction(pa[1])
+    bx,by = Fraction(pb[0]),Fraction(pb[1])
+    cx,cy = Fraction(pc[0]),Fraction(pc[1])
+    return float( (ax - cx) * (by - cy) - (ay - cy) * (bx - cx) )
+
+
+def orient2d( pa, pb, pc ):
+    """Return a positive value if the points pa, pb and pc are in counterclockwise order,
+    a negative value if they are in clockwise order, and zero if they are collinear.
+
+    The value approximates twice the signed area of the triangle, but its sign is exact."""
+    detleft  = (pa[0] - pc[0]) * (pb[1] - pc[1])
+    detright = (pa[1] - pc[1]) * (pb[0] - pc[0])
+    det = detleft - detright
+
+    # If both terms have not the same sign, there is no cancellation.
+    if detleft > 0:
+        if detright <= 0:
+            return det
+        detsum = detleft + detright
+    elif detleft < 0:
+        if detright >= 0:
+            return det
+        detsum = -detleft - detright
+    else:
+        return det
+
+    errbound = ccwerrbound * detsum
+    if det >= errbound or -det >= errbound:
+        return det
+
+    return orient2d_exact( pa, pb, pc )
+
+
+def incircle_exact( pa, pb, pc, pd ):
+    dx,dy = Fraction(pd[0]),Fraction(pd[1])
+    adx,ady = Fraction(pa[0]) - dx, Fraction(pa[1]) - dy
+    bdx,bdy = Fraction(pb[0]) - dx, Fraction(pb[1]) - dy
+    cdx,cdy = Fraction(pc[0]) - dx, Fraction(pc[1]) - dy
+    alift = adx * adx + ady * ady
+    blift = bdx * bdx + bdy * bdy
+    clift = cdx * cdx + cdy * cdy
+    return float( alift * (bdx * cdy - cdx * bdy)
+                + blift * (cdx * ady - adx * cdy)
+                + clift * (adx * bdy - bdx * ady) )
+
+
+def incircle( pa, pb, pc, pd ):
+    """Return a positive value if the point pd lies inside the circle passing through pa, pb and pc,
+    a negative value if it lies outside, and zero if the four points are cocircular.
+    The points pa, pb and pc must be in counterclockwise order, or the sign of the result is reversed.
+
+    The sign of the result is exact."""
+    adx = pa[0] - pd[0]
+    bdx = pb[0] - pd[0]
+    cdx = pc[0] - pd[0]
+    ady = pa[1] - pd[1]
+    bdy = pb[1] - pd[1]
+    cdy = pc[1] - pd[1]
+
+    bdxcdy = bdx * cdy
+    cdxbdy = cdx * bdy
+    alift = adx * adx + ady * ady
+
+    cdxady = cdx * ady
+    adxcdy = adx * cdy
+    blift = bdx * bdx + bdy * bdy
+
+    adxbdy = adx * bdy
+    bdxady = bdx * ady
+    clift = cdx * cdx + cdy * cdy
+
+    det = alift * (bdxcdy - cdxbdy) \
+        + blift * (cdxady - adxcdy) \
+        + clift * (adxbdy - bdxady)
+
+    permanent = (abs(bdxcdy) + abs(cdxbdy)) * alift \
+              + (abs(cdxady) + abs(adxcdy)) * blift \
+              + (abs(adxbdy) + abs(bdxady)) * clift
+    errbound = iccerrbound * permanent
+    if det > errbound or -det > errbound:
+        return det
+
+    # A point on the circle because it is one of the three others does not need exact arithmetic.
+    if pd == pa or pd == pb or pd == pc:
+        return 0.0
+
+    return incircle_exact( pa, pb, pc, pd )
+
+
+if __name__ == "__main__":
+
+    # Points close to the line passing through (12,12) and (24,24), as in Shewchuk's paper.
+    # The naive determinant gives wrong signs for many of them, the predicate never does.
+    ulp = 2**-53
+    a,b = (12.0,12.0),(24.0,24.0)
+    wrong_naive = 0
+    wrong_robust = 0
+    for i in range(64):
+        for j in range(64):
+            p = (0.5 + i * ulp, 0.5 + j * ulp)
+            exact = cmp( orient2d_exact( a, b, p ), 0 )
+            naive = cmp( (a[0] - p[0]) * (b[1] - p[1]) - (a[1] - p[1]) * (b[0] - p[0]), 0 )
+            if naive != exact:
+                wrong_naive += 1
+            if cmp( orient2d( a, b, p ), 0 ) != exact:
+                wrong_robust += 1
+    print "wrong signs over",64*64,"points: naive",wrong_naive,"robust",wrong_robust
@@ -183,7 +183,11 @@ class QuadTree(object):
 
 
     def build( self, points ):
-        """Append all the given points in the quadtree."""
+        """Append all the given points in the quadtree.
+
+        Points may be a geometry.PointSet, which coordinates are then converted all at once."""
+        if isinstance( points, geometry.PointSet ):
+            points = points.tuples()
         for p in points:
             self.append(p)
         assert( len(points) == len(self) )
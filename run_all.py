@@ -3,7 +3,6 @@
 
 import os
 import sys
-import turtle
 import argparse
 import matplotlib.pyplot as plot
 from itertools import ifilterfalse as filter_if_not
@@ -15,7 +14,7 @@ from geometry import x,y
 import hull
 import uberplot
 import shortpath
-import lindenmayer
+import penrose
 import geometry
 import triangulation
 import voronoi
@@ -27,6 +26,16 @@ parser.add_argument('-p', "--penrose", help="Do not compute the Penrose tiling b
         default=None, action='store', type=str, metavar="SEGMENTS")
 parser.add_argument( '-d', '--depth', help="Recursive depth of the Lindenmayer computations = size of the Penrose tiling",
         default=1, type=int, metavar="DEPTH")
+parser.add_argument('-l', "--lazy", help="Expand the Lindenmayer system symbols one at a time instead of building the whole string (uses far less memory at high depths)",
+        default=False, action='store_true')
+parser.add_argument('-x', "--exact", help="Use exact integer coordinates for the Penrose vertices, instead of rounded floats",
+        default=False, action='store_true')
+parser.add_argument('-s', "--stamp", help="Draw the Lindenmayer system by stamping cached templates of the symbols expansions, instead of interpreting each symbol",
+        default=False, action='store_true')
+parser.add_argument('-b', "--bbox", help="Only draw the Lindenmayer system segments that are within the given box",
+        default=None, type=float, nargs=4, metavar=("XMIN","YMIN","XMAX","YMAX"))
+parser.add_argument('-e', "--deflation", help="Build the Penrose tiling by deflating Robinson triangles instead of using the Lindenmayer system",
+        default=False, action='store_true')
 
 parser.add_argument('-t', "--notsp", help="Do not compute the TSP",
         default=False, action='store_true')
@@ -35,6 +44,16 @@ parser.add_argument('-r', "--tour", help="Load several TSP tour from a file",
 parser.add_argument('-m', "--pheromones", help="Load a pheromones matrix from a file",
         default=None, action='store', type=str, metavar="MATRIX")
 
+parser.add_argument('-a', "--delaunay", help="Algorithm used to compute the Delaunay triangulation",
+        default="bowyer-watson", choices=["bowyer-watson","divide-and-conquer"])
+parser.add_argument('-j', "--jobs", help="Compute the triangulation of vertical strips of points in parallel, with this number of processes, then merge them (gives the same result than the divide and conquer algorithm)",
+        default=None, type=int, metavar="PROCESSES")
+parser.add_argument('-c', "--constrained", help="Compute a constrained Delaunay triangulation, with the Penrose segments as edges, which triangles are exactly the halves of the diamonds",
+        default=False, action='store_true')
+parser.add_argument('-f', "--faces", help="Do not compute the triangulation nor the Voronoi diagram, but find the diamonds as the faces of the Penrose graph and link them",
+        default=False, action='store_true')
+parser.add_argument('-o', "--order", help="Order in which the Bowyer-Watson algorithm inserts the points",
+        default="sorted", choices=["sorted","hilbert","brio"])
 parser.add_argument('-g', "--triangulation", help="Do not compute the Delaunay triangulation but load it from a file",
         default=None, action='store', type=str, metavar="SEGMENTS")
 parser.add_argument('-v', "--voronoi", help="Do not compute the Voronoï diagram but load it from a file",
@@ -86,6 +105,17 @@ if ask_for.penrose:
     with open(ask_for.penrose) as fd:
         penrose_segments = utils.load_segments(fd)
 
+elif ask_for.deflation:
+    LOGN( "Deflate the penrose tiling" )
+
+    segment_size = 10
+    float_rounding = 10
+
+    penrose_segments = penrose.tiling( depth, size=segment_size, heading=0, rounding=float_rounding )
+    LOGN( "\tsegments",len(penrose_segments) )
+    with open("d%i_penrose.segments" % depth, "w") as fd:
+        utils.write_segments( penrose_segments, fd )
+
 else:
     LOGN( "Draw the penrose tiling" )
 
@@ -93,24 +123,23 @@ else:
     segment_size = 10
     float_rounding = 10
 
-    ttl = turtle.Turtle()
-    ttl.speed('fastest')
-    penrose = lindenmayer.DumpTurtleLSystem(ttl, 
-            axiom="[X]++[X]++[X]++[X]++[X]", 
-            rules={
-                'F': "",
-                'W': "YF++ZF----XF[-YF----WF]++",
-                'X': "+YF--ZF[---WF--XF]+",
-                'Y': "-WF++XF[+++YF++ZF]-",
-                'Z': "--YF++++WF[+ZF++++XF]--XF"
-            }, 
-            angle=36, heading=0, size=segment_size, rounding=float_rounding )
-
-    # actually do something
-    penrose.draw( depth )
+    if ask_for.bbox:
+        xmin,ymin,xmax,ymax = ask_for.bbox
+        bbox = ( (xmin,ymin), (xmax,ymax) )
+
+        # Do not use the Tk turtle, but the headless (and faster) interpreter.
+        lsystem = penrose.lsystem( size=segment_size, rounding=float_rounding, exact=ask_for.exact )
+
+        # actually do something
+        lsystem.draw( depth, lazy = ask_for.lazy, bbox = bbox, stamped = ask_for.stamp )
+        penrose_segments = lsystem.segments
+
+    else:
+        # Only draw one of the five symmetric branches, and rotate it.
+        penrose_segments = penrose.symmetric( depth, size=segment_size, rounding=float_rounding,
+                exact=ask_for.exact, lazy=ask_for.lazy, stamped=ask_for.stamp )
 
     # save this intermediate step
-    penrose_segments = penrose.segments
     LOGN( "\tsegments",len(penrose_segments) )
     with open("d%i_penrose.segments" % depth, "w") as fd:
         utils.write_segments( penrose_segments, fd )
@@ -181,28 +210,41 @@ if ask_for.triangulation:
     with open(ask_for.triangulation) as fd:
         triangulated = triangulation.load(fd)
 
+elif ask_for.faces:
+    LOGN( "Do not compute the triangulation, the diamonds are the faces of the Penrose graph" )
+
 else:
     LOGN( "Compute the triangulation of the penrose vertices" )
     points = utils.vertices_of(penrose_segments)
-    triangles = triangulation.delaunay_bowyer_watson( points, do_plot = False )
+    if ask_for.constrained:
+        # Each diamond is made of two consecutive triangles, there is nothing to remove.
+        triangulated = triangulation.delaunay_constrained( points, penrose_segments )
 
-    LOGN( "\tRemove triangles that are not sub-parts of the Penrose tiling" )
+    else:
+        if ask_for.jobs:
+            triangles = triangulation.delaunay_parallel( points, processes = ask_for.jobs )
+        elif ask_for.delaunay == "divide-and-conquer":
+            triangles = triangulation.delaunay_divide_and_conquer( points )
+        else:
+            triangles = triangulation.delaunay_bowyer_watson( points, do_plot = False, order = ask_for.order )
 
+        LOGN( "\tRemove triangles that are not sub-parts of the Penrose tiling" )
 
-    # Filter (i.e. keep) triangles that are strictly acute,
-    def strictly_acute(triangle):
-        # By excluding edges, we also ensure that no triangle can be collinear nor rectangle,
-        return triangulation.is_acute( triangle, exclude_edges = True )
-    triangulated_acute = list(filter( strictly_acute, triangles ))
-    # A more consise but less readable one-liner would be:
-    # triangulated = list(filter( lambda t: triangulation.is_acute( t, exclude_edges = True ), triangles ))
 
-    # def not_collinear(triangle):
-    #     return not geometry.collinear(*triangle)
-    # triangulated = list(filter( not_collinear, triangulated_acute ))
-    triangulated = triangulated_acute
+        # Filter (i.e. keep) triangles that are strictly acute,
+        # by excluding edges, we also ensure that no triangle can be collinear nor rectangle.
+        # The circumcircles of all the triangles are computed at once.
+        centers,radii2,kinds = triangulation.circumcircles( triangles )
+        triangulated_acute = [ t for t,kind in zip( triangles, kinds ) if kind == triangulation.ACUTE ]
+        # A slower one-liner, computing the circumcircles one by one, would be:
+        # triangulated = list(filter( lambda t: triangulation.is_acute( t, exclude_edges = True ), triangles ))
 
-    LOGN( "\t\tRemoved", len(triangles)-len(triangulated), "triangles from", len(triangles))
+        # def not_collinear(triangle):
+        #     return not geometry.collinear(*triangle)
+        # triangulated = list(filter( not_collinear, triangulated_acute ))
+        triangulated = triangulated_acute
+
+        LOGN( "\t\tRemoved", len(triangles)-len(triangulated), "triangles from", len(triangles))
 
     with open("d%i_triangulation.triangles" % depth, "w") as fd:
         triangulation.write( triangulated, fd )
@@ -220,6 +262,17 @@ if ask_for.voronoi:
     with open(ask_for.voronoi) as fd:
         voronoi_graph = graph.load( fd )
 
+elif ask_for.faces:
+    LOGN( "Link the diamonds of the Penrose tiling" )
+    # Walking around the faces of the Penrose graph directly gives the diamonds.
+    diamonds = [ face for face in graph.faces_of( graph.graph_of( penrose_segments ) ) if len(face) == 4 ]
+    LOGN( "\tFound",len(diamonds),"diamonds" )
+    # Link the centers of the diamonds having a common vertex, as the merged Voronoï diagram does.
+    voronoi_graph = graph.faces_graph( diamonds, vertices = True )
+
+    with open("d%i_voronoi.graph" % depth, "w") as fd:
+        graph.write( voronoi_graph, fd )
+
 else:
     LOGN( "Compute the Voronoï diagram of the triangulation" )
     # Changing the neighborhood to be on vertices instead of edges will not compute the true Voronoï dual graph,
@@ -232,7 +285,11 @@ else:
     LOG("\t\tMerge",len(voronoi_tri_graph),"nodes")
     with open("d%i_voronoi_dual.graph" % depth, "w") as fd:
         graph.write( voronoi_tri_graph, fd )
-    voronoi_graph = voronoi.merge_enclosed( voronoi_tri_graph, penrose_segments )
+    if ask_for.constrained:
+        # The triangles of a diamond are already known.
+        voronoi_graph = voronoi.merge_pairs( voronoi_tri_graph, triangulated )
+    else:
+        voronoi_graph = voronoi.merge_enclosed( voronoi_tri_graph, penrose_segments )
     LOGN("as",len(voronoi_graph),"enclosed nodes")
 
     with open("d%i_voronoi.graph" % depth, "w") as fd:
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+import random
+
+import geometry
+
+
+def all_pairs( segments ):
+    """The intersections among the given segments, by testing all the pairs."""
+    found = {}
+    for i in range(len(segments)):
+        for j in range(i+1,len(segments)):
+            point = geometry.segment_intersection( segments[i], segments[j] )
+            if point is not None:
+                found[(i,j)] = point
+    return found
+
+
+def test_sweep_is_all_pairs():
+    """The sweep line finds the same intersections than testing all the pairs,
+    with crossing segments, shared ends and collinear overlapping segments."""
+    rand = random.Random( 0 )
+    crossing = [ ( (rand.uniform(0,100),rand.uniform(0,100)), (rand.uniform(0,100),rand.uniform(0,100)) ) for i in range(100) ]
+
+    # Segments between the nodes of an integer grid, many of them sharing ends or overlapping.
+    nodes = [ (float(i),float(j)) for i in range(5) for j in range(5) ]
+    grid = []
+    while len(grid) < 100:
+        p,q = rand.sample( nodes, 2 )
+        grid.append( (p,q) )
+
+    # Collinear segments on a slanted, a horizontal and a vertical line, overlapping or sharing an end.
+    collinear = [ ((0.,0.),(2.,2.)), ((1.,1.),(3.,3.)), ((2.,2.),(4.,4.)),
+                  ((0.,1.),(3.,1.)), ((2.,1.),(5.,1.)), ((3.,1.),(4.,1.)),
+                  ((1.,0.),(1.,3.)), ((1.,2.),(1.,4.)), ((0.,3.),(4.,-1.)) ]
+
+    for segments in ( crossing, grid, collinear, crossing + grid + collinear ):
+        assert( geometry.sweep_intersections( segments ) == all_pairs( segments ) )
+
+
+def test_pointset_slice():
+    """A slice of a PointSet is a PointSet holding a copy of the coordinates."""
+    points = geometry.PointSet( [ (1.,2.),(3.,4.),(5.,6.) ] )
+    tail = points[1:]
+    assert( isinstance( tail, geometry.PointSet ) )
+    assert( tail.tuples() == [ (3.,4.),(5.,6.) ] )
+    tail.coords[0] = (7.,8.)
+    assert( points[1] == (3.,4.) )
+
+
+if __name__ == "__main__":
+    test_sweep_is_all_pairs()
+    test_pointset_slice()
+    print "ok"
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+import penrose
+import lindenmayer
+
+
+def test_draw_twice():
+    """Drawing again on the same system gives the segments of the new depth only."""
+    for lazy in (False,True):
+        lsystem = penrose.lsystem( size = 10 )
+        lsystem.draw( 2, lazy = lazy )
+        first = set( lsystem.segments )
+        lsystem.draw( 4, lazy = lazy )
+        lsystem.draw( 2, lazy = lazy )
+        assert( set( lsystem.segments ) == first )
+        assert( len( lsystem.segments ) == len(first) )
+
+
+def test_arrays_are_copies():
+    """The exported arrays do not change when segments are added to the store afterwards."""
+    store = lindenmayer.SegmentStore( [ ((0.,0.),(1.,0.)), ((1.,0.),(1.,1.)) ] )
+    coords,edges = store.as_arrays()
+    for i in range(1000):
+        store.add( (float(i),2.), (float(i),3.) )
+    assert( coords.tolist() == [[0.,0.],[1.,0.],[1.,1.]] )
+    assert( edges.tolist() == [[0,1],[1,2]] )
+
+
+def test_store_duplicates():
+    """A segment and its reversed clone are stored once, even when added after the store has been read."""
+    store = lindenmayer.SegmentStore( [ ((0.,0.),(1.,0.)), ((1.,0.),(0.,0.)), ((1.,0.),(1.,1.)) ] )
+    assert( len(store) == 2 )
+    store.add( (1.,1.), (1.,0.) )
+    store.add( (1.,1.), (0.,0.) )
+    assert( list(store) == [ ((0.,0.),(1.,0.)), ((1.,0.),(1.,1.)), ((0.,0.),(1.,1.)) ] )
+    assert( ((1.,1.),(0.,0.)) in store )
+    assert( ((0.,1.),(0.,0.)) not in store )
+
+
+if __name__ == "__main__":
+    test_draw_twice()
+    test_arrays_are_copies()
+    test_store_duplicates()
+    print "ok"
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+
+import penrose
+import predicates
+
+
+def segments_set( segments ):
+    return set( frozenset(seg) for seg in segments )
+
+
+def test_deflation_is_lsystem():
+    """The deflated tiling has the same segments than the L-system at the same depth."""
+    for depth in range(1,6):
+        lsystem = penrose.lsystem( size = 10 )
+        lsystem.draw( depth )
+        deflated = penrose.tiling( depth, size = 10 )
+        assert( segments_set( deflated ) == segments_set( lsystem.segments ) )
+
+
+def test_no_crossing():
+    """No segments of the deflated tiling properly cross each other."""
+    for depth in range(1,6):
+        segments = list( penrose.tiling( depth, size = 10 ) )
+        for i,(a,b) in enumerate(segments):
+            for c,d in segments[:i]:
+                assert( not ( predicates.orient2d(a,b,c) * predicates.orient2d(a,b,d) < 0
+                          and predicates.orient2d(c,d,a) * predicates.orient2d(c,d,b) < 0 ) )
+
+
+if __name__ == "__main__":
+    test_deflation_is_lsystem()
+    test_no_crossing()
+    print "ok"
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+
+import math
+
+import predicates
+
+
+def naive_incircle( pa, pb, pc, pd ):
+    """The floating point determinant of incircle, without the exact fallback."""
+    adx,ady = pa[0] - pd[0], pa[1] - pd[1]
+    bdx,bdy = pb[0] - pd[0], pb[1] - pd[1]
+    cdx,cdy = pc[0] - pd[0], pc[1] - pd[1]
+    return (adx * adx + ady * ady) * (bdx * cdy - cdx * bdy) \
+         + (bdx * bdx + bdy * bdy) * (cdx * ady - adx * cdy) \
+         + (cdx * cdx + cdy * cdy) * (adx * bdy - bdx * ady)
+
+
+def test_incircle_near_cocircular():
+    """Near the circle, incircle falls back to exact arithmetic and gives the sign of incircle_exact,
+    where the floating point determinant alone is sometimes wrong."""
+    for c in (12.0, 1000.0, 123456.0):
+        # Three points on the circle of radius 5 around (c,c), counter-clockwise, and a fourth one on it.
+        a,b,d = (c+5,c),(c,c+5),(c-3,c+4)
+        on = (c+3,c-4)
+        assert( predicates.incircle_exact( a, b, d, on ) == 0 )
+        assert( predicates.incircle( a, b, d, (c,c) ) > 0 )
+        assert( predicates.incircle( a, b, d, (c+6,c) ) < 0 )
+
+        # Points around the fourth one, a few units in the last place apart.
+        ulp = math.ldexp( 1, math.frexp(c)[1] - 53 )
+        wrong_naive = 0
+        for i in range(-16,16):
+            for j in range(-16,16):
+                p = (on[0] + i * ulp, on[1] + j * ulp)
+                exact = cmp( predicates.incircle_exact( a, b, d, p ), 0 )
+                assert( cmp( predicates.incircle( a, b, d, p ), 0 ) == exact )
+                if cmp( naive_incircle( a, b, d, p ), 0 ) != exact:
+                    wrong_naive += 1
+        assert( wrong_naive > 0 )
+
+
+def test_incircle_repeated_point():
+    """A point which is one of the three others is on the circle."""
+    a,b,c = (0.1,0.2),(0.7,0.3),(0.3,0.9)
+    for p in (a,b,c):
+        assert( predicates.incircle( a, b, c, p ) == 0 )
+
+
+if __name__ == "__main__":
+    test_incircle_near_cocircular()
+    test_incircle_repeated_point()
+    print "ok"
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+import random
+from StringIO import StringIO
+
+import utils
+import penrose
+import predicates
+import triangulation
+
+
+def random_points( nb, seed = 0 ):
+    rand = random.Random( seed )
+    return [ (rand.uniform(0,100),rand.uniform(0,100)) for i in range(nb) ]
+
+
+def grid_points( nb ):
+    """Points on a square grid, where every four neighbouring points are on the same circle."""
+    return [ (float(i),float(j)) for i in range(nb) for j in range(nb) ]
+
+
+def penrose_points( depth ):
+    """Vertices of the Penrose tiling, where five points or more are often on the same circle."""
+    return sorted( utils.vertices_of( penrose.tiling( depth, size = 10 ) ) )
+
+
+def triangles_set( triangles ):
+    """The set of the triangles, each one starting from its smallest vertex, so that the orientation is kept."""
+    triangles = [ tuple(t) for t in triangles ]
+    return set( min( t[i:] + t[:i] for i in range(3) ) for t in triangles )
+
+
+def test_divide_and_conquer_is_bowyer_watson():
+    """The divide and conquer triangulation has all the Bowyer-Watson triangles on random points,
+    and the same strictly acute triangles on cocircular points."""
+    points = random_points( 500 )
+    assert( triangles_set( triangulation.delaunay_bowyer_watson( points ) )
+            <= triangles_set( triangulation.delaunay_divide_and_conquer( points ) ) )
+
+    def acute( triangles ):
+        return triangles_set( t for t in triangles if triangulation.is_acute( t, exclude_edges = True ) )
+
+    for points in ( random_points( 500 ), grid_points( 15 ), penrose_points( 4 ) ):
+        assert( acute( triangulation.delaunay_bowyer_watson( points ) )
+                == acute( triangulation.delaunay_divide_and_conquer( points ) ) )
+
+
+def test_insert_is_bowyer_watson():
+    """Inserting the sorted points one by one gives the Bowyer-Watson triangles, in the same order."""
+    for points in ( random_points( 500 ), grid_points( 15 ), penrose_points( 4 ) ):
+        dt = triangulation.DelaunayTriangulation( points )
+        assert( dt.triangles() == triangulation.delaunay_bowyer_watson( points ) )
+
+
+def test_remove():
+    """Removing points gives the triangles of the remaining points if they are on distinct circles,
+    and a Delaunay triangulation anyway."""
+    points = random_points( 500 )
+    supertri = triangulation.supertriangle( sorted(points) )
+    shuffled = list(points)
+    random.Random(1).shuffle( shuffled )
+    dt = triangulation.DelaunayTriangulation( supertri = supertri )
+    for p in shuffled:
+        dt.insert( p )
+    for p in shuffled[:400]:
+        dt.remove( p )
+    expected = triangulation.delaunay_bowyer_watson( shuffled[400:], supertri = supertri )
+    assert( triangles_set( dt.triangles() ) == triangles_set( expected ) )
+
+    for points in ( grid_points( 15 ), penrose_points( 4 ) ):
+        dt = triangulation.DelaunayTriangulation( points )
+        for p in points[::3]:
+            dt.remove( p )
+        vertices = dt.vertices()
+        assert( len(vertices) == len(points) - len(points[::3]) )
+        for a,b,c in dt.triangles():
+            assert( not any( predicates.incircle( a, b, c, p ) > 0 for p in vertices ) )
+
+
+def test_tiled_is_divide_and_conquer():
+    """The tiled triangulation gives the divide and conquer triangles, once cocircular points are triangulated as fans."""
+    # The tiles are written with six decimals, thus the points are rounded beforehand.
+    rounded = [ (round(x,3),round(y,3)) for x,y in random_points( 300 ) ]
+    integers = [ (i,j) for i in range(10) for j in range(10) ]
+    skinny = [ (float(i),0.001 * (i % 2)) for i in range(50) ]
+    for points in ( rounded, integers, skinny ):
+        expected = triangles_set( triangulation.cocircular_fans( triangulation.delaunay_divide_and_conquer( points ) ) )
+        for tiles in (1,3,5):
+            stream = StringIO()
+            count = triangulation.delaunay_tiled( points, stream, tiles )
+            triangles = triangulation.load( StringIO( stream.getvalue() ) )
+            assert( count == len(expected) )
+            assert( triangles_set( triangles ) == expected )
+
+
+def test_parallel_is_divide_and_conquer():
+    """The multi-process triangulation gives the triangles of the divide and conquer one."""
+    for points in ( random_points( 500 ), grid_points( 15 ), [ (float(i),2.*i) for i in range(20) ] ):
+        expected = triangles_set( triangulation.delaunay_divide_and_conquer( points ) )
+        for processes in (2,3,8):
+            triangles = triangulation.delaunay_parallel( points, processes = processes )
+            assert( len(triangles) == len(expected) )
+            assert( triangles_set( triangles ) == expected )
+
+
+if __name__ == "__main__":
+    test_divide_and_conquer_is_bowyer_watson()
+    test_insert_is_bowyer_watson()
+    test_remove()
+    test_tiled_is_divide_and_conquer()
+    test_parallel_is_divide_and_conquer()
+    print "ok"
@@ -1,10 +1,21 @@
 
 import sys
 import math
+import random
+import itertools
+import collections
+import multiprocessing
 from itertools import ifilterfalse as filter_if_not
 
 from utils import tour,LOG,LOGN
-from geometry import mid,middle,x,y
+from geometry import mid,middle,x,y,PointSet
+import predicates
+
+try:
+    import numpy
+except ImportError:
+    # Only needed for the batched circumcircles.
+    numpy = None
 
 # Based on http://paulbourke.net/papers/triangulate/
 # Efficient Triangulation Algorithm Suitable for Terrain Modelling
@@ -22,10 +33,22 @@ class CoincidentPointsError(Exception):
     """Coincident points"""
     pass
 
+class OutsideTriangulationError(Exception):
+    """Point outside of the super-triangle"""
+    pass
+
+class CrossingSegmentsError(Exception):
+    """Segment crossing an already inserted one"""
+    pass
+
 def circumcircle( triangle, epsilon = sys.float_info.epsilon ):
     """Compute the circumscribed circle of a triangle and 
     Return a 2-tuple: ( (center_x, center_y), radius )"""
 
+    # Triangle records compute their circle only once.
+    if isinstance( triangle, Triangle ) and epsilon == sys.float_info.epsilon:
+        return triangle.circumcircle()
+
     assert( len(triangle) == 3 )
     p0,p1,p2 = triangle
     assert( len(p0) == 2 )
@@ -77,20 +100,26 @@ def in_circle( p, center, radius, epsilon  = sys.float_info.epsilon ):
 
     dxp = x(p) - cx
     dyp = y(p) - cy
-    dr = math.sqrt(dxp**2 + dyp**2)
 
-    if (dr - radius) <= epsilon:
+    # Compare squared distances, to avoid the square root:
+    # dr - radius <= epsilon  <=>  dr**2 <= (radius + epsilon)**2
+    if dxp**2 + dyp**2 <= (radius + epsilon)**2:
         return True
     else:
         return False
 
 
 def in_circumcircle( p, triangle, epsilon  = sys.float_info.epsilon ):
-    """Return True if the given point p is in the circumscribe circle of the given triangle"""
+    """Return True if the given point p is in (or on) the circumscribe circle of the given triangle.
+
+    Use the incircle robust predicate, thus points on the circle are exactly detected.
+    The epsilon is not used anymore and is only kept for compatibility."""
 
     assert( len(p) == 2 )
-    (cx,cy),r = circumcircle( triangle, epsilon )
-    return in_circle( p, (cx,cy), r, epsilon )
+    a,b,c = triangle
+    # The sign of incircle is reversed if the triangle is clockwise.
+    orientation = cmp( predicates.orient2d(a,b,c), 0 )
+    return cmp( predicates.incircle(a,b,c,p), 0 ) * orientation >= 0
 
 
 def in_triangle( p0, triangle, exclude_edges = False ):
@@ -120,8 +149,116 @@ def is_acute(triangle, exclude_edges = False ):
     return in_triangle( circumcircle(triangle)[0], triangle, exclude_edges )
 
 
+# Kinds of triangles, given by the location of the center of their circumcircle.
+ACUTE,RIGHT,OBTUSE = 0,1,2
+
+def circumcircles( triangles ):
+    """Compute the circumscribed circles of all the given triangles at once, with arrays.
+
+    The triangles are a (T,3,2) array, or a list of triangles.
+    Return a 3-tuple of arrays: the (T,2) centers, the (T,) squared distances from the centers to the second vertices
+    and the (T,) kinds of the triangles,
+    which are ACUTE if the center strictly lies inside the triangle, RIGHT if it lies on an edge, or OBTUSE.
+
+    The same operations than circumcircle and in_triangle are done in the same order,
+    thus the results are exactly the same, bit for bit. Collinear triangles are OBTUSE."""
+    if not isinstance( triangles, numpy.ndarray ):
+        triangles = [ [ tuple(p) for p in t ] for t in triangles ]
+    t = numpy.asarray( triangles, dtype=float ).reshape(-1,3,2)
+    x0,y0 = t[:,0,0],t[:,0,1]
+    x1,y1 = t[:,1,0],t[:,1,1]
+    x2,y2 = t[:,2,0],t[:,2,1]
+    epsilon = sys.float_info.epsilon
+
+    dy01 = numpy.abs( y0 - y1 )
+    dy12 = numpy.abs( y1 - y2 )
+    flat01 = dy01 < epsilon
+    flat12 = dy12 < epsilon
+    if numpy.any( flat01 & flat12 ):
+        raise CoincidentPointsError
+
+    # Horizontal edges give infinite slopes, which are not used by the branch of their triangle.
+    with numpy.errstate( divide="ignore", invalid="ignore" ):
+        m01 = -1 * ( x1 - x0 ) / ( y1 - y0 )
+        m12 = -1 * ( x2 - x1 ) / ( y2 - y1 )
+        mx01,my01 = ( x0 + x1 ) / 2.0, ( y0 + y1 ) / 2.0
+        mx12,my12 = ( x1 + x2 ) / 2.0, ( y1 + y2 ) / 2.0
+
+        cx = ( m01 * mx01 - m12 * mx12 + my12 - my01 ) / ( m01 - m12 )
+        cx[flat01] = mx01[flat01]
+        cx[flat12] = mx12[flat12]
+        on01 = ( dy01 > dy12 ) & ~flat01 | flat12
+        cy = numpy.where( on01, m01 * ( cx - mx01 ) + my01, m12 * ( cx - mx12 ) + my12 )
+
+        dx,dy = x1 - cx, y1 - cy
+        radii2 = dx * dx + dy * dy
+
+        # Barycentric coordinates of the centers.
+        det = (y1 - y2) * (x0 - x2) + (x2 - x1) * (y0 - y2)
+        alpha = ( (y1 - y2) * (cx - x2) + (x2 - x1) * (cy - y2) ) / det
+        beta  = ( (y2 - y0) * (cx - x2) + (x0 - x2) * (cy - y2) ) / det
+        gamma = 1.0 - alpha - beta
+        bary = numpy.column_stack( (alpha,beta,gamma) )
+
+        inside = numpy.all( (0 < bary) & (bary < 1), axis=1 )
+        on_edge = numpy.all( (0 <= bary) & (bary <= 1), axis=1 )
+
+    kinds = numpy.where( inside, ACUTE, numpy.where( on_edge, RIGHT, OBTUSE ) )
+    return numpy.column_stack( (cx,cy) ),radii2,kinds
+
+
+class Triangle(object):
+    """A triangle which behaves like a 3-tuple of points,
+    but computes its circumscribed circle only once, when first asked for.
+
+    Equality and hashing are the ones of the tuple of its vertices."""
+    __slots__ = ('vertices','hash','circle')
+
+    def __init__( self, vertices ):
+        self.vertices = tuple(vertices)
+        assert( len(self.vertices) == 3 )
+        self.hash = hash(self.vertices)
+        self.circle = None
+
+    def circumcircle( self ):
+        """Return the ( (center_x, center_y), radius ) circumscribed circle, as computed by triangulation.circumcircle."""
+        if self.circle is None:
+            self.circle = circumcircle( self.vertices )
+        return self.circle
+
+    # Tuple-like API.
+
+    def __len__( self ):
+        return 3
+
+    def __getitem__( self, i ):
+        return self.vertices[i]
+
+    def __iter__( self ):
+        return iter(self.vertices)
+
+    def __contains__( self, p ):
+        return p in self.vertices
+
+    def __eq__( self, other ):
+        if isinstance( other, Triangle ):
+            return self.vertices == other.vertices
+        return self.vertices == other
+
+    def __ne__( self, other ):
+        return not self == other
+
+    def __hash__( self ):
+        return self.hash
+
+    def __repr__( self ):
+        return "Triangle(%r)" % (self.vertices,)
+
+
 def bounds( vertices ):
     """Return the iso-axis rectangle enclosing the given points"""
+    if isinstance( vertices, PointSet ):
+        return vertices.box()
     # find vertices set bounds
     xmin = x(vertices[0])
     ymin = y(vertices[0])
@@ -158,28 +295,127 @@ def supertriangle( vertices, delta = 0.1 ):
     return supertri
 
 
+def hilbert_index( n, i, j ):
+    """Return the index of the cell (i,j) along the Hilbert curve filling a n by n grid, n being a power of two."""
+    d = 0
+    s = n / 2
+    while s > 0:
+        ri = 1 if i & s else 0
+        rj = 1 if j & s else 0
+        d += s * s * ((3 * ri) ^ rj)
+        # Rotate the quadrant, so that the curve is always entered the same way.
+        if rj == 0:
+            if ri == 1:
+                i = n-1 - i
+                j = n-1 - j
+            i,j = j,i
+        s /= 2
+    return d
+
+
+def hilbert_sorted( points, bits = 16 ):
+    """Return the given points sorted along a Hilbert space-filling curve,
+    so that consecutive points are near each other."""
+    points = list(points)
+    if not points:
+        return points
+    (xmin,ymin),(xmax,ymax) = bounds( points )
+    n = 2**bits
+    # Integer coordinates would give an integer division.
+    scale = float(n-1) / max( xmax - xmin, ymax - ymin, sys.float_info.epsilon )
+    return sorted( points, key = lambda p: hilbert_index( n, int((x(p)-xmin)*scale), int((y(p)-ymin)*scale) ) )
+
+
+def brio_sorted( points, seed = 0 ):
+    """Return the given points in a biased randomized insertion order (BRIO).
+
+    Each point is drawn in the last round with probability 1/2, in the one before with probability 1/4, and so on.
+    The rounds are inserted from the first (and smallest) one and each round is sorted along a Hilbert curve.
+    The randomness keeps the cavities small, the sort keeps consecutive points near each other."""
+    rand = random.Random( seed )
+    rounds = collections.defaultdict( list )
+    for p in points:
+        r = 0
+        while rand.random() < 0.5:
+            r += 1
+        # The more coin flips, the earlier the round.
+        rounds[r].append( p )
+    vertices = []
+    for r in sorted( rounds, reverse = True ):
+        vertices += hilbert_sorted( rounds[r] )
+    return vertices
+
+
+def locate( vertex, triangle, halfedges ):
+    """Walk across the triangulation from the given triangle toward the given vertex,
+    and return the triangle containing it (or one of them, if the vertex lies on an edge).
+
+    halfedges: a dictionary mapping each oriented edge (p,q) to the counter-clockwise triangle owning it.
+    The walk always ends on a Delaunay triangulation, if the vertex is in it."""
+    while True:
+        for p,q in tour(list(triangle)):
+            # If the vertex is on the right of an edge, go to the triangle on the other side.
+            if predicates.orient2d( p, q, vertex ) < 0:
+                triangle = halfedges[(q,p)]
+                break
+        else:
+            return triangle
+
+
 def delaunay_bowyer_watson( points, supertri = None, superdelta = 0.1, epsilon = sys.float_info.epsilon,
-        do_plot = None, plot_filename = "Bowyer-Watson_%i.png" ):
+        do_plot = None, plot_filename = "Bowyer-Watson_%i.png", order = "sorted" ):
     """Return the Delaunay triangulation of the given points
 
     epsilon: used for floating point comparisons, two points are considered equals if their distance is < epsilon.
+    order: the order in which points are inserted, either "sorted" (on x, then on y),
+        "hilbert" (along a Hilbert curve) or "brio" (biased randomized rounds, each along a Hilbert curve).
     do_plot: if not None, plot intermediate steps on this matplotlib object and save them as images named: plot_filename % i
     """
 
     if do_plot and len(points) > 10:
         print "WARNING it is a bad idea to plot each steps of a triangulation of many points"
 
-    # Sort points first on the x-axis, then on the y-axis.
-    vertices = sorted( points )
+    if order == "hilbert":
+        vertices = hilbert_sorted( points )
+    elif order == "brio":
+        vertices = brio_sorted( points )
+    else:
+        assert( order == "sorted" )
+        # Sort points first on the x-axis, then on the y-axis.
+        vertices = sorted( points )
 
     # LOGN( "super-triangle",supertri )
     if not supertri:
         supertri = supertriangle( vertices, superdelta )
-
-    # It is the first triangle of the list.
-    triangles = [ supertri ]
-
-    completed = { supertri: False }
+    # The new triangles have the orientation of the ones they replace,
+    # make them all counter-clockwise.
+    if predicates.orient2d( *supertri ) < 0:
+        supertri = (supertri[0],supertri[2],supertri[1])
+
+    # Each oriented edge of the triangulation is owned by a single triangle,
+    # the neighbour across the edge (p,q) of a triangle is thus the owner of the edge (q,p).
+    halfedges = {}
+
+    # The current triangles, along with their creation rank.
+    # Triangles are removed in any order and new ones are created last,
+    # thus sorting them on their rank gives the order in which they would be in a list.
+    triangles = {}
+    rank = itertools.count()
+
+    def add( triangle ):
+        triangles[triangle] = next(rank)
+        for edge in tour(list(triangle)):
+            halfedges[edge] = triangle
+
+    def remove( triangle ):
+        del triangles[triangle]
+        for edge in tour(list(triangle)):
+            del halfedges[edge]
+
+    # It is the first triangle.
+    supertri = Triangle( supertri )
+    add( supertri )
+    last = supertri
 
     # The predicate returns true if at least one of the vertices
     # is also found in the supertriangle.
@@ -225,88 +461,69 @@ def delaunay_bowyer_watson( points, supertri = None, superdelta = 0.1, epsilon =
         # All the triangles whose circumcircle encloses the point to be added are identified,
         # the outside edges of those triangles form an enclosing polygon.
 
-        # Forget previous candidate polygon's edges.
-        enclosing = []
+        # The triangle containing the vertex is found by walking from the last created one,
+        # which is near, because consecutive vertices are near each other.
+        # It is in the cavity, and the other triangles of the cavity are connected to it:
+        # they are found by a breadth-first search across the edges.
+        first = locate( vertex, last, halfedges )
+        removed = [first]
+        tested = set([first])
+        queue = collections.deque([first])
+        while queue:
+            triangle = queue.popleft()
+            for p0,p1 in tour(list(triangle)):
+                # The super-triangle's edges have no neighbour.
+                neighbour = halfedges.get( (p1,p0), None )
+                if neighbour is None or neighbour in tested:
+                    continue
+                tested.add( neighbour )
+
+                # If the current vertex is inside the circumscribe circle of the neighbour,
+                # it is in the cavity.
+                inside = in_circumcircle( vertex, neighbour )
+                if inside:
+                    removed.append( neighbour )
+                    queue.append( neighbour )
 
-        removed = []
-        for triangle in triangles:
-            # LOGN( "\t\ttriangle",triangle )
-            assert( len(triangle) == 3 )
-
-            # Do not consider triangles already tested.
-            # If completed has a key, test it, else return False.
-            if completed.get( triangle, False ):
-                # LOGN( "\t\t\tAlready completed" )
-                # if do_plot:
-                    # uberplot.plot_segments( ax, tour(list(triangle)), edgecolor = "magenta", alpha=1, lw=1, linestyle='dotted' )
-                continue
-
-            # LOGN( "\t\t\tCircumcircle" ) 
-            assert( triangle[0] != triangle[1] and triangle[1] != triangle [2] and triangle[2] != triangle[0] )
-            center,radius = circumcircle( triangle, epsilon )
-
-            # If it match Delaunay's conditions.
-            if x(center) < x(vertex) and math.sqrt((x(vertex)-x(center))**2) > radius:
-                # LOGN( "\t\t\tMatch Delaunay, mark as completed" ) 
-                completed[triangle] = True
-
-            # If the current vertex is inside the circumscribe circle of the current triangle,
-            # add the current triangle's edges to the candidate polygon.
-            if in_circle( vertex, center, radius, epsilon ):
-                # LOGN( "\t\t\tIn circumcircle, add to enclosing polygon",triangle )
                 if do_plot:
-                    circ = plot.Circle(center, radius, facecolor='yellow', edgecolor="orange", alpha=0.2, clip_on=False)
+                    center,radius = circumcircle( neighbour, epsilon )
+                    if inside:
+                        circ = plot.Circle(center, radius, facecolor='yellow', edgecolor="orange", alpha=0.2, clip_on=False)
+                    else:
+                        circ = plot.Circle(center, radius, facecolor='lightgrey', edgecolor="grey", alpha=0.2, clip_on=False)
                     ax.add_patch(circ)
 
-                for p0,p1 in tour(list(triangle)):
-                    # Then add this edge to the polygon enclosing the vertex,
-                    enclosing.append( (p0,p1) )
-                # and remove the corresponding triangle from the current triangulation.
-                removed.append( triangle )
-                completed.pop(triangle,None)
-
-            elif do_plot:
-                circ = plot.Circle(center, radius, facecolor='lightgrey', edgecolor="grey", alpha=0.2, clip_on=False)
-                ax.add_patch(circ)
+        # Visit the cavity in the order of the triangulation.
+        removed.sort( key = lambda t: triangles[t] )
+        cavity = set(removed)
 
-        # end for triangle in triangles
-
-        # The triangles in the enclosing polygon are deleted and
-        # new triangles are formed between the point to be added and
-        # each outside edge of the enclosing polygon. 
-
-        # Actually remove triangles.
-        for triangle in removed:
-            triangles.remove(triangle)
-
-
-        # Remove duplicated edges.
-        # This leaves the edges of the enclosing polygon only,
-        # because enclosing edges are only in a single triangle,
-        # but edges inside the polygon are at least in two triangles.
+        # The enclosing polygon is made of the edges of the cavity that are not shared by two of its triangles,
+        # they keep their orientation.
         hull = []
-        for i,(p0,p1) in enumerate(enclosing):
-            # Clockwise edges can only be in the remaining part of the list.
-            # Search for counter-clockwise edges as well.
-            if (p0,p1) not in enclosing[i+1:] and (p1,p0) not in enclosing:
-                hull.append((p0,p1))
-            elif do_plot:
-                uberplot.plot_segments( ax, [(p0,p1)], edgecolor = "white", alpha=1, lw=1, linestyle='dotted' )
-
-
+        for triangle in removed:
+            for p0,p1 in tour(list(triangle)):
+                if halfedges.get( (p1,p0), None ) not in cavity:
+                    hull.append((p0,p1))
+                elif do_plot:
+                    uberplot.plot_segments( ax, [(p0,p1)], edgecolor = "white", alpha=1, lw=1, linestyle='dotted' )
 
         if do_plot:
             uberplot.plot_segments( ax, hull, edgecolor = "red", alpha=1, lw=1, linestyle='solid' )
 
+        # The triangles in the enclosing polygon are deleted and
+        # new triangles are formed between the point to be added and
+        # each outside edge of the enclosing polygon.
+        for triangle in removed:
+            remove( triangle )
 
         # Create new triangles using the current vertex and the enclosing hull.
         # LOGN( "\t\tCreate new triangles" )
         for p0,p1 in hull:
             assert( p0 != p1 )
-            triangle = tuple([p0,p1,vertex])
+            triangle = Triangle([p0,p1,vertex])
             # LOGN("\t\t\tNew triangle",triangle)
-            triangles.append( triangle )
-            completed[triangle] = False
+            add( triangle )
+            last = triangle
 
             if do_plot:
                 uberplot.plot_segments( ax, [(p0,vertex),(p1,vertex)], edgecolor = "green", alpha=1, linestyle='solid' )
@@ -321,6 +538,7 @@ def delaunay_bowyer_watson( points, supertri = None, superdelta = 0.1, epsilon =
     # end for vertex in vertices
     LOGN(" done")
 
+    triangles = sorted( triangles, key = triangles.get )
 
     # Remove triangles that have at least one of the supertriangle vertices.
     # LOGN( "\tRemove super-triangles" ) 
@@ -341,6 +559,824 @@ def delaunay_bowyer_watson( points, supertri = None, superdelta = 0.1, epsilon =
     return triangulation
 
 
+class DelaunayTriangulation(object):
+    """A Delaunay triangulation in which points can be inserted or removed one at a time,
+    without computing it again from scratch.
+
+    As in the Bowyer-Watson algorithm, the points are triangulated along with the vertices of a super-triangle,
+    which must enclose all the points that will ever be inserted.
+    The triangles having a vertex of the super-triangle are not part of the triangulation.
+    Inserting the sorted points gives the same triangles, in the same order, than delaunay_bowyer_watson."""
+
+    def __init__( self, points = [], supertri = None, superdelta = 0.1 ):
+        vertices = sorted( points )
+        if not supertri:
+            supertri = supertriangle( vertices, superdelta )
+        # All the triangles are counter-clockwise.
+        if predicates.orient2d( *supertri ) < 0:
+            supertri = (supertri[0],supertri[2],supertri[1])
+        self.supertri = Triangle( supertri )
+
+        # The triangle owning each oriented edge.
+        self.halfedges = {}
+        # The creation rank of each triangle.
+        self.ranks = {}
+        self.rank = itertools.count()
+        # One of the triangles having each vertex.
+        self.incident = {}
+        # The oriented edges that are forced by insert_segment.
+        self.constraints = set()
+
+        self.add( self.supertri )
+        self.last = self.supertri
+
+        for vertex in vertices:
+            self.insert( vertex )
+
+    def add( self, triangle ):
+        self.ranks[triangle] = next(self.rank)
+        for edge in tour(list(triangle)):
+            self.halfedges[edge] = triangle
+        for p in triangle:
+            self.incident[p] = triangle
+        self.last = triangle
+
+    def discard( self, triangle ):
+        del self.ranks[triangle]
+        for edge in tour(list(triangle)):
+            del self.halfedges[edge]
+
+    def insert( self, vertex ):
+        """Add the given point to the triangulation, if it is not already in it."""
+        assert( len(vertex) == 2 )
+        if vertex in self.incident:
+            return
+        for p,q in tour(list(self.supertri)):
+            if predicates.orient2d( p, q, vertex ) <= 0:
+                raise OutsideTriangulationError
+
+        # Find the cavity of the triangles whose circumcircle encloses the vertex, by a breadth-first search.
+        first = locate( vertex, self.last, self.halfedges )
+        removed = [first]
+        tested = set([first])
+        queue = collections.deque([first])
+        while queue:
+            triangle = queue.popleft()
+            for p0,p1 in tour(list(triangle)):
+                neighbour = self.halfedges.get( (p1,p0), None )
+                if neighbour is None or neighbour in tested:
+                    continue
+                tested.add( neighbour )
+                if in_circumcircle( vertex, neighbour ):
+                    removed.append( neighbour )
+                    queue.append( neighbour )
+
+        removed.sort( key = self.ranks.get )
+        cavity = set(removed)
+        hull = []
+        for triangle in removed:
+            for p0,p1 in tour(list(triangle)):
+                if self.halfedges.get( (p1,p0), None ) not in cavity:
+                    hull.append((p0,p1))
+
+        # Replace the cavity by a fan of triangles around the vertex.
+        for triangle in removed:
+            self.discard( triangle )
+        for p0,p1 in hull:
+            self.add( Triangle([p0,p1,vertex]) )
+
+    def star( self, vertex ):
+        """Return the triangles having the given vertex, in counter-clockwise order around it."""
+        first = self.incident[vertex]
+        triangles = []
+        triangle = first
+        while True:
+            triangles.append( triangle )
+            i = list(triangle).index( vertex )
+            # The next triangle around the vertex is the one owning the edge from the vertex to the previous one.
+            triangle = self.halfedges[ (vertex, triangle[(i+2)%3]) ]
+            if triangle is first:
+                return triangles
+
+    def remove( self, vertex ):
+        """Remove the given point from the triangulation and triangulate the hole it lets."""
+        assert( vertex not in self.supertri )
+        star = self.star( vertex )
+
+        # The polygon linking the neighbours of the vertex, in counter-clockwise order.
+        polygon = []
+        for triangle in star:
+            i = list(triangle).index( vertex )
+            polygon.append( triangle[(i+1)%3] )
+        for triangle in star:
+            self.discard( triangle )
+        del self.incident[vertex]
+
+        # Cut the ears of the polygon that are Delaunay triangles,
+        # that is convex ears which circumcircle do not enclose any other vertex of the polygon.
+        while len(polygon) > 3:
+            for i in range(len(polygon)):
+                a,b,c = polygon[i-2],polygon[i-1],polygon[i]
+                if predicates.orient2d( a, b, c ) > 0 and \
+                   all( predicates.incircle( a, b, c, p ) <= 0 for p in polygon if p not in (a,b,c) ):
+                    self.add( Triangle([a,b,c]) )
+                    del polygon[i-1]
+                    break
+            else:
+                assert( False ) # There is always a Delaunay ear.
+        self.add( Triangle(polygon) )
+
+    def insert_segment( self, a, b ):
+        """Force the segment between the given points of the triangulation to be an edge of it.
+
+        The triangles crossed by the segment are removed
+        and the polygons on both sides of the segment are triangulated again,
+        so that the triangulation is a constrained Delaunay triangulation.
+        Segments should be inserted after all the points.
+        Raise a CrossingSegmentsError if the segment crosses an already inserted one."""
+        assert( a in self and b in self )
+        if (a,b) in self.halfedges or (b,a) in self.halfedges:
+            self.constraints.update( [(a,b),(b,a)] )
+            return
+
+        # Find the triangle around a, crossed by the segment.
+        for triangle in self.star( a ):
+            i = list(triangle).index( a )
+            u,v = triangle[(i+1)%3],triangle[(i+2)%3]
+            # If the segment goes through a vertex, insert both parts.
+            if predicates.orient2d( a, b, u ) == 0 and \
+               (x(u) - x(a)) * (x(b) - x(a)) + (y(u) - y(a)) * (y(b) - y(a)) > 0:
+                self.insert_segment( a, u )
+                self.insert_segment( u, b )
+                return
+            if predicates.orient2d( a, u, b ) > 0 and predicates.orient2d( a, v, b ) < 0:
+                break
+
+        # Walk along the segment, u being on its right and v on its left.
+        crossed = [triangle]
+        right,left = [u],[v]
+        while True:
+            if (u,v) in self.constraints:
+                raise CrossingSegmentsError
+            triangle = self.halfedges[(v,u)]
+            crossed.append( triangle )
+            w = [p for p in triangle if p not in (u,v)][0]
+            if w == b:
+                break
+            side = predicates.orient2d( a, b, w )
+            if side == 0:
+                # The segment goes through w.
+                self.insert_segment( a, w )
+                self.insert_segment( w, b )
+                return
+            elif side < 0:
+                right.append( w )
+                u = w
+            else:
+                left.append( w )
+                v = w
+
+        for triangle in crossed:
+            self.discard( triangle )
+        # Both sides are at the left of the edges (a,b) and (b,a), respectively.
+        self.fill( a, b, left )
+        self.fill( b, a, right[::-1] )
+        self.constraints.update( [(a,b),(b,a)] )
+
+    def fill( self, p, q, chain ):
+        """Triangulate the polygon made of the edge (p,q) and the chain of vertices on its left, going from p to q."""
+        if not chain:
+            return
+        # The vertex of the chain whose circle with p and q does not enclose any other vertex of the chain.
+        k = 0
+        for i,v in enumerate(chain):
+            if predicates.incircle( p, q, chain[k], v ) > 0:
+                k = i
+        c = chain[k]
+        self.add( Triangle([p,q,c]) )
+        self.fill( p, c, chain[:k] )
+        self.fill( c, q, chain[k+1:] )
+
+    def __len__( self ):
+        return len(self.incident) - 3
+
+    def __contains__( self, vertex ):
+        return vertex in self.incident and vertex not in self.supertri
+
+    def vertices( self ):
+        """Return the list of points in the triangulation."""
+        return [ p for p in self.incident if p not in self.supertri ]
+
+    def triangles( self ):
+        """Return the list of the triangles, in the order in which they have been created,
+        excluding the ones having a vertex of the super-triangle."""
+        return [ t for t in sorted( self.ranks, key = self.ranks.get )
+                 if t[0] not in self.supertri and t[1] not in self.supertri and t[2] not in self.supertri ]
+
+    def edges( self ):
+        """Return the list of the edges of the triangles, each edge being given once."""
+        edges = []
+        for triangle in self.triangles():
+            for p,q in tour(list(triangle)):
+                # An inner edge is in two triangles, with opposite directions.
+                neighbour = self.halfedges.get( (q,p), None )
+                if p < q or neighbour is None or any( v in self.supertri for v in neighbour ):
+                    edges.append( (p,q) )
+        return edges
+
+
+def delaunay_constrained( points, segments ):
+    """Return the constrained Delaunay triangulation of the given points, where the given segments are edges,
+    keeping only the triangles that are halves of a quadrilateral made of four segments,
+    which are the rhombi of a Penrose tiling.
+
+    The triangles are given two by two: each pair of consecutive triangles are the halves of the same quadrilateral.
+    A segment crossing one of the previous segments cannot be an edge and is ignored."""
+    dt = DelaunayTriangulation( points )
+    LOG("Insert segments: ")
+    for a,b in segments:
+        try:
+            dt.insert_segment( a, b )
+        except CrossingSegmentsError:
+            LOG("x")
+    LOGN("done")
+
+    def halves( triangle ):
+        """Return the only edge of the triangle which is not a segment, if there is one."""
+        free = [ e for e in tour(list(triangle)) if e not in dt.constraints ]
+        if len(free) == 1:
+            return free[0]
+
+    triangles = []
+    for triangle in dt.triangles():
+        diagonal = halves( triangle )
+        if diagonal is None:
+            continue
+        p,q = diagonal
+        other = dt.halfedges.get( (q,p), None )
+        # Consider each pair once, from its first triangle.
+        if other is not None and dt.ranks[triangle] < dt.ranks[other] \
+           and not any( v in dt.supertri for v in other ) and halves( other ) == (q,p):
+            triangles += [ triangle, other ]
+    return triangles
+
+
+# Based on:
+# Leonidas Guibas and Jorge Stolfi,
+#     Primitives for the Manipulation of General Subdivisions and the Computation of Voronoi Diagrams,
+#     ACM Transactions on Graphics, 4(2), 1985.
+
+class Edge(object):
+    """One of the four directed edges of a quad-edge.
+
+    The four edges of a quad-edge are linked by rot, that rotates the edge by a quarter turn counter-clockwise:
+    the edge itself, its dual edge, its reverse (sym) and its reversed dual.
+    The next edge is the following one, counter-clockwise, around the origin of the edge."""
+    __slots__ = ('origin','next','rot')
+
+    @property
+    def sym(self):
+        return self.rot.rot
+
+    @property
+    def dest(self):
+        return self.rot.rot.origin
+
+    @property
+    def onext(self):
+        return self.next
+
+    @property
+    def oprev(self):
+        return self.rot.next.rot
+
+    @property
+    def lnext(self):
+        return self.rot.rot.rot.next.rot
+
+    @property
+    def rprev(self):
+        return self.rot.rot.next
+
+
+def make_edge( org, dest ):
+    """Return a new isolated edge going from org to dest"""
+    quad = [ Edge() for i in range(4) ]
+    for i in range(4):
+        quad[i].rot = quad[(i+1)%4]
+    e = quad[0]
+    e.next = e
+    e.sym.next = e.sym
+    e.rot.next = e.rot.sym
+    e.rot.sym.next = e.rot
+    e.origin = org
+    e.sym.origin = dest
+    return e
+
+
+def splice( a, b ):
+    """Join the rings of edges around the origins of a and b if they are distinct, or split it if not."""
+    alpha = a.next.rot
+    beta = b.next.rot
+    a.next,b.next = b.next,a.next
+    alpha.next,beta.next = beta.next,alpha.next
+
+
+def connect( a, b ):
+    """Add a new edge going from the destination of a to the origin of b, so that all three have the same left face."""
+    e = make_edge( a.dest, b.origin )
+    splice( e, a.lnext )
+    splice( e.sym, b )
+    return e
+
+
+def delete( e ):
+    """Remove the given edge from the subdivision."""
+    splice( e, e.oprev )
+    splice( e.sym, e.sym.oprev )
+
+
+def ccw( a, b, c ):
+    return predicates.orient2d( a, b, c ) > 0
+
+
+def right_of( p, e ):
+    return ccw( p, e.dest, e.origin )
+
+
+def left_of( p, e ):
+    return ccw( p, e.origin, e.dest )
+
+
+def delaunay_edges( vertices ):
+    """Return the counter-clockwise convex hull edge out of the leftmost vertex
+    and the clockwise convex hull edge out of the rightmost vertex of the Delaunay triangulation
+    of the given vertices, which are sorted and distinct."""
+    assert( len(vertices) >= 2 )
+
+    if len(vertices) == 2:
+        a = make_edge( vertices[0], vertices[1] )
+        return a, a.sym
+
+    elif len(vertices) == 3:
+        p0,p1,p2 = vertices
+        a = make_edge( p0, p1 )
+        b = make_edge( p1, p2 )
+        splice( a.sym, b )
+        # Close the triangle.
+        if ccw( p0, p1, p2 ):
+            connect( b, a )
+            return a, b.sym
+        elif ccw( p0, p2, p1 ):
+            c = connect( b, a )
+            return c.sym, c
+        # The three vertices are collinear.
+        else:
+            return a, b.sym
+
+    # Divide.
+    half = len(vertices) / 2
+    ldo,ldi = delaunay_edges( vertices[:half] )
+    rdi,rdo = delaunay_edges( vertices[half:] )
+
+    return merge_halves( ldo, ldi, rdi, rdo )
+
+
+def merge_halves( ldo, ldi, rdi, rdo ):
+    """Merge the Delaunay triangulations of two halves of the vertices, given by their hull edges, as returned by delaunay_edges,
+    and return the hull edges of the merged triangulation."""
+    # Compute the lower common tangent of the two halves.
+    while True:
+        if left_of( rdi.origin, ldi ):
+            ldi = ldi.lnext
+        elif right_of( ldi.origin, rdi ):
+            rdi = rdi.rprev
+        else:
+            break
+
+    # The base edge, from the right half to the left one, is the first edge of the merge.
+    basel = connect( rdi.sym, ldi )
+    if ldi.origin == ldo.origin:
+        ldo = basel.sym
+    if rdi.origin == rdo.origin:
+        rdo = basel
+
+    def valid( e ):
+        return right_of( e.dest, basel )
+
+    # Merge, by going up from the base edge.
+    while True:
+        # Delete the edges of the left half that fail the circle test.
+        lcand = basel.sym.onext
+        if valid( lcand ):
+            while predicates.incircle( basel.dest, basel.origin, lcand.dest, lcand.onext.dest ) > 0:
+                t = lcand.onext
+                delete( lcand )
+                lcand = t
+
+        # Same for the right half.
+        rcand = basel.oprev
+        if valid( rcand ):
+            while predicates.incircle( basel.dest, basel.origin, rcand.dest, rcand.oprev.dest ) > 0:
+                t = rcand.oprev
+                delete( rcand )
+                rcand = t
+
+        # If none of the candidates is valid, the upper common tangent is reached.
+        if not valid( lcand ) and not valid( rcand ):
+            break
+
+        # Connect to the candidate which circle does not contain the other one.
+        if not valid( lcand ) or \
+           ( valid( rcand ) and predicates.incircle( lcand.dest, lcand.origin, rcand.origin, rcand.dest ) > 0 ):
+            basel = connect( rcand, basel.sym )
+        else:
+            basel = connect( basel.sym, lcand.sym )
+
+    return ldo, rdo
+
+
+def faces_of( *starts ):
+    """Return the counter-clockwise triangles of the subdivision holding the given edges."""
+    # Walk over every edge and gather the faces at their left.
+    triangles = []
+    visited = set()
+    stack = list(starts)
+    while stack:
+        e = stack.pop()
+        if e in visited:
+            continue
+        visited.add( e )
+        stack.append( e.sym )
+        stack.append( e.onext )
+
+        # The outer face is the only one that is not a counter-clockwise triangle.
+        a = e.lnext
+        b = a.lnext
+        if b.lnext is e and ccw( e.origin, a.origin, b.origin ) \
+           and a not in visited and b not in visited:
+            triangles.append( Triangle([e.origin, a.origin, b.origin]) )
+    return triangles
+
+
+def delaunay_divide_and_conquer( points ):
+    """Return the Delaunay triangulation of the given points, as a list of counter-clockwise 3-tuples of points.
+
+    Use the Guibas and Stolfi divide and conquer algorithm, which runs in O(n log n).
+    Duplicated points are considered once.
+    If four points or more are on the same circle, the triangulation may differ from the Bowyer-Watson one,
+    while being a Delaunay triangulation as well."""
+
+    # Sort points first on the x-axis, then on the y-axis.
+    vertices = sorted( set(points) )
+    if len(vertices) < 3:
+        return []
+
+    LOG("Divide and conquer: ")
+    # The recursion depth is only log(n).
+    start,end = delaunay_edges( vertices )
+    LOG(".")
+
+    triangles = faces_of( start )
+    LOGN(" done")
+
+    return triangles
+
+
+def cocircular_fans( triangles ):
+    """Return the given counter-clockwise triangles of a Delaunay triangulation,
+    where the triangles sharing the same circumcircle are replaced by a fan around their smallest vertex.
+
+    Four points or more on the same circle can be triangulated in several ways,
+    depending on the algorithm and on the insertion order.
+    With fans, the result only depends on the points."""
+    halfedges = {}
+    for triangle in triangles:
+        for edge in tour(list(triangle)):
+            halfedges[edge] = triangle
+
+    fans = []
+    seen = set()
+    for triangle in triangles:
+        if triangle in seen:
+            continue
+        seen.add( triangle )
+
+        # Gather the neighbours having the same circumcircle.
+        cluster = [triangle]
+        queue = [triangle]
+        while queue:
+            current = queue.pop()
+            for p,q in tour(list(current)):
+                neighbour = halfedges.get( (q,p), None )
+                if neighbour is None or neighbour in seen:
+                    continue
+                opposite = [v for v in neighbour if v not in (p,q)][0]
+                if predicates.incircle( triangle[0], triangle[1], triangle[2], opposite ) == 0:
+                    seen.add( neighbour )
+                    cluster.append( neighbour )
+                    queue.append( neighbour )
+
+        if len(cluster) == 1:
+            fans.append( triangle )
+            continue
+
+        # The edges of the convex polygon made by the cluster, counter-clockwise.
+        inside = set(cluster)
+        following = {}
+        for t in cluster:
+            for p,q in tour(list(t)):
+                if halfedges.get( (q,p), None ) not in inside:
+                    following[p] = q
+        polygon = [ min(following) ]
+        while len(polygon) < len(following):
+            polygon.append( following[polygon[-1]] )
+        for i in range( 1, len(polygon)-1 ):
+            fans.append( Triangle([polygon[0], polygon[i], polygon[i+1]]) )
+
+    return fans
+
+
+def delaunay_tiled( points, stream, tiles = 4 ):
+    """Compute the Delaunay triangulation of the given points tile by tile, and write it in the given stream,
+    in the same format than triangulation.write.
+
+    The bounding box of the points is cut in tiles by tiles square tiles.
+    The points of a tile are triangulated along with the points of a halo of surrounding tiles,
+    and the triangles whose smallest vertex is in the tile are written as soon as they are certified:
+    when the circumcircles of all the triangles touching the tile do not enclose any point out of the halo,
+    and when no point lies out of the convex hull edges touching the tile,
+    those triangles are the ones of the whole triangulation.
+    Else, the halo is widened by one ring of tiles.
+    Thus, only the triangles of a tile and its halo are held in memory.
+
+    The triangles are the ones of delaunay_divide_and_conquer,
+    except that the points on the same circle are triangulated as by cocircular_fans.
+    Return the number of written triangles."""
+
+    vertices = sorted( set(points) )
+    if len(vertices) < 3:
+        return 0
+    (xmin,ymin),(xmax,ymax) = bounds( vertices )
+    width = float( max( xmax - xmin, ymax - ymin, sys.float_info.epsilon ) ) / tiles
+
+    def tile_of( p ):
+        return ( min( int( (x(p) - xmin) / width ), tiles-1 ),
+                 min( int( (y(p) - ymin) / width ), tiles-1 ) )
+
+    buckets = collections.defaultdict( list )
+    for p in vertices:
+        buckets[tile_of(p)].append( p )
+
+    # The bounding box of the points of each tile.
+    boxes = dict( (tile,bounds(bucket)) for tile,bucket in buckets.items() )
+
+    def inside_circle( triangle, halo ):
+        """Return True if a point out of the given tiles is in (or on) the circumcircle of the given triangle."""
+        (ax,ay),(bx,by),(qx,qy) = [ (float(x(p)),float(y(p))) for p in triangle ]
+        bx,by = bx - ax, by - ay
+        qx,qy = qx - ax, qy - ay
+        det = bx * qy - by * qx
+        # The center is only used to skip the tiles which are far away if it is accurate enough,
+        # else (nearly collinear triangle) the points of all the tiles are tested.
+        accurate = abs(det) > 1e-6 * ( abs(bx * qy) + abs(by * qx) )
+        if accurate:
+            b2,q2 = bx * bx + by * by, qx * qx + qy * qy
+            ux = ( qy * b2 - by * q2 ) / ( 2 * det )
+            uy = ( bx * q2 - qx * b2 ) / ( 2 * det )
+            cx,cy = ax + ux, ay + uy
+            r = math.sqrt( ux * ux + uy * uy )
+        for tile,((bx0,by0),(bx1,by1)) in boxes.items():
+            if tile in halo:
+                continue
+            # Only test the points of the tiles which box is near enough,
+            # with a small margin, so that rounding errors do not matter.
+            if accurate:
+                dx = max( bx0 - cx, 0, cx - bx1 )
+                dy = max( by0 - cy, 0, cy - by1 )
+                if math.sqrt( dx**2 + dy**2 ) > r * (1 + 1e-9) + width * 1e-9:
+                    continue
+            for p in buckets[tile]:
+                if in_circumcircle( p, triangle ):
+                    return True
+        return False
+
+    def outside_hull( edge, halo ):
+        """Return True if a point out of the given tiles is on the right of the given edge."""
+        p,q = edge
+        for tile,((bx0,by0),(bx1,by1)) in boxes.items():
+            if tile in halo:
+                continue
+            corners = [ (bx0,by0), (bx1,by0), (bx1,by1), (bx0,by1) ]
+            if all( predicates.orient2d( p, q, c ) >= 0 for c in corners ):
+                continue
+            for r in buckets[tile]:
+                if predicates.orient2d( p, q, r ) < 0:
+                    return True
+        return False
+
+    LOG("Triangulate",tiles*tiles,"tiles: ")
+    count = 0
+    for tile in sorted( buckets ):
+        i,j = tile
+        ring = 1
+        while True:
+            i0,j0 = max(i-ring,0),max(j-ring,0)
+            i1,j1 = min(i+ring,tiles-1),min(j+ring,tiles-1)
+            halo = set( (k,l) for k in range(i0,i1+1) for l in range(j0,j1+1) )
+            local = []
+            for k in sorted( halo ):
+                local += buckets.get( k, [] )
+
+            triangles = cocircular_fans( delaunay_divide_and_conquer( local ) )
+
+            # The triangles and the convex hull edges touching the tile.
+            touching = [ t for t in triangles if any( tile_of(p) == tile for p in t ) ]
+            edges = set( e for t in triangles for e in tour(list(t)) )
+            hull = [ (p,q) for t in touching for p,q in tour(list(t))
+                     if (q,p) not in edges and ( tile_of(p) == tile or tile_of(q) == tile ) ]
+
+            whole = all( k in halo for k in buckets )
+            if whole or ( touching
+                    and not any( inside_circle( t, halo ) for t in touching )
+                    and not any( outside_hull( e, halo ) for e in hull ) ):
+                break
+            ring += 1
+
+        # Each triangle is written by the tile holding its smallest vertex.
+        owned = [ t for t in touching if tile_of( min(t) ) == tile ]
+        write( owned, stream )
+        count += len(owned)
+        LOG(".")
+    LOGN(" done")
+
+    return count
+
+
+def counterclockwise( origin, p, q ):
+    """Compare the directions from origin to p and to q, by their angle counter-clockwise from the x-axis."""
+    # Directions in the upper half-plane (and along the positive x-axis) come first.
+    half_p = 0 if y(p) > y(origin) or ( y(p) == y(origin) and x(p) > x(origin) ) else 1
+    half_q = 0 if y(q) > y(origin) or ( y(q) == y(origin) and x(q) > x(origin) ) else 1
+    if half_p != half_q:
+        return cmp( half_p, half_q )
+    return -cmp( predicates.orient2d( origin, p, q ), 0 )
+
+
+def subdivision_of( edges ):
+    """Build the quad-edges of the planar subdivision made of the given (p,q) edges,
+    and return a dictionary mapping each oriented edge to its Edge."""
+    halfedges = {}
+    around = collections.defaultdict( list )
+    for p,q in edges:
+        e = make_edge( p, q )
+        halfedges[(p,q)] = e
+        halfedges[(q,p)] = e.sym
+        around[p].append( e )
+        around[q].append( e.sym )
+
+    # Link the edges around each vertex, in counter-clockwise order.
+    for vertex,outgoing in around.items():
+        vx,vy = vertex
+        # Sorting on the angle is fast, but rounding may swap nearly aligned edges:
+        # check the order with exact predicates and sort again if needed.
+        outgoing.sort( key = lambda e: math.atan2( y(e.dest) - vy, x(e.dest) - vx ) % (2 * math.pi) )
+        if any( counterclockwise( vertex, a.dest, b.dest ) > 0 for a,b in zip( outgoing, outgoing[1:] ) ):
+            outgoing.sort( cmp = lambda a,b: counterclockwise( vertex, a.dest, b.dest ) )
+        for a,b in zip( outgoing, outgoing[1:] ):
+            splice( a, b )
+    return halfedges
+
+
+def within( triangle, left, right ):
+    """Return True if the circumcircle of the given triangle lies strictly between the given abscissae,
+    which may be None if there is no bound."""
+    (ax,ay),(bx,by),(qx,qy) = [ (float(x(p)),float(y(p))) for p in triangle ]
+    bx,by = bx - ax, by - ay
+    qx,qy = qx - ax, qy - ay
+    det = bx * qy - by * qx
+    # A nearly collinear triangle has an inaccurate center, and a huge circle anyway.
+    if not abs(det) > 1e-3 * ( abs(bx * qy) + abs(by * qx) ):
+        return False
+    b2,q2 = bx * bx + by * by, qx * qx + qy * qy
+    ux = ( qy * b2 - by * q2 ) / ( 2 * det )
+    uy = ( bx * q2 - qx * b2 ) / ( 2 * det )
+    cx = ax + ux
+    # With a small margin, so that rounding errors do not matter.
+    r = math.sqrt( ux * ux + uy * uy ) * (1 + 1e-6) + abs(cx) * 1e-12
+    return ( left is None or left < cx - r ) and ( right is None or cx + r < right )
+
+
+def strip_triangles( strip ):
+    """Triangulate a strip of sorted and distinct vertices, given along the abscissae of its left and right bounds,
+    and return the triangles which are already the ones of the whole triangulation,
+    the (origin,destination) edges which may be changed by the merge with the other strips,
+    and the hull edges, as returned by delaunay_edges.
+
+    The vertices of the other strips are beyond the bounds,
+    thus a triangle which circumcircle lies strictly between the bounds is never removed by the merges.
+    The returned edges are all the edges around the vertices of the other triangles and of the hull,
+    so that the merges find the same edges around the vertices they visit."""
+    vertices,left,right = strip
+    ldo,rdo = delaunay_edges( vertices )
+
+    final = []
+    kept = set()
+    for triangle in faces_of( ldo ):
+        if within( triangle, left, right ):
+            final.append( tuple(triangle) )
+        else:
+            kept.update( triangle )
+
+    edges = []
+    visited = set()
+    stack = [ldo]
+    while stack:
+        e = stack.pop()
+        if e in visited:
+            continue
+        visited.add( e )
+        stack.append( e.sym )
+        stack.append( e.onext )
+        # The vertices of the edges which face on their left is not a triangle are on the hull.
+        a = e.lnext
+        b = a.lnext
+        if not ( b.lnext is e and ccw( e.origin, a.origin, b.origin ) ):
+            kept.update( (e.origin, e.dest) )
+    for e in visited:
+        if e.origin < e.dest and ( e.origin in kept or e.dest in kept ):
+            edges.append( (e.origin, e.dest) )
+
+    return final, edges, (ldo.origin, ldo.dest), (rdo.origin, rdo.dest)
+
+
+def strips_of( vertices, levels ):
+    """Return the lists of vertices that the divide and conquer algorithm reaches after the given number of splits."""
+    if levels == 0 or len(vertices) < 4:
+        return [ vertices ]
+    half = len(vertices) / 2
+    return strips_of( vertices[:half], levels-1 ) + strips_of( vertices[half:], levels-1 )
+
+
+def delaunay_parallel( points, processes = None ):
+    """Return the Delaunay triangulation of the given points, computed by several processes.
+
+    The sorted vertices are cut in strips exactly where the divide and conquer algorithm would split them,
+    each strip is triangulated by a process, which returns the triangles that no merge can change,
+    along with the edges around the other ones. Only the latter are rebuilt,
+    and the strips are merged along their boundaries, as the divide and conquer algorithm would do.
+    Thus, the triangles are the ones of delaunay_divide_and_conquer, though not in the same order.
+    processes: the number of processes, if None, use the number of processors,
+        if 1, simply call delaunay_divide_and_conquer."""
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    vertices = sorted( set(points) )
+    if len(vertices) < 3:
+        return []
+
+    if processes == 1:
+        return delaunay_divide_and_conquer( vertices )
+
+    # As many strips as processes, at least.
+    levels = int( math.ceil( math.log( processes, 2 ) ) )
+    strips = strips_of( vertices, levels )
+    # The abscissae of the neighbouring strips' vertices are beyond the ones of the strip's ends.
+    bounds = [ ( x(strip[0]) if i > 0 else None, x(strip[-1]) if i < len(strips)-1 else None )
+               for i,strip in enumerate(strips) ]
+
+    LOG("Triangulate",len(strips),"strips: ")
+    pool = multiprocessing.Pool( processes )
+    results = pool.map( strip_triangles, [ (strip,left,right) for strip,(left,right) in zip( strips, bounds ) ] )
+    pool.close()
+    pool.join()
+    LOG(".")
+
+    # Rebuild the part of the triangulations of the strips that the merges may change.
+    halfedges = subdivision_of( e for final,edges,ldo,rdo in results for e in edges )
+    hulls = iter( [ (halfedges[ldo],halfedges[rdo]) for final,edges,ldo,rdo in results ] )
+
+    # Merge them back up, in the same order than delaunay_edges.
+    def merged( vertices, levels ):
+        if levels == 0 or len(vertices) < 4:
+            return next( hulls )
+        half = len(vertices) / 2
+        ldo,ldi = merged( vertices[:half], levels-1 )
+        rdi,rdo = merged( vertices[half:], levels-1 )
+        return merge_halves( ldo, ldi, rdi, rdo )
+
+    merged( vertices, levels )
+    LOG(".")
+
+    triangles = [ Triangle(t) for final,edges,ldo,rdo in results for t in final ]
+    # The rebuilt edges also hold some of the final triangles.
+    known = set( frozenset(t) for t in triangles )
+    triangles += [ t for t in faces_of( *halfedges.values() ) if frozenset(t) not in known ]
+    LOGN(" done")
+
+    return triangles
+
+
 def edges_of( triangulation ):
     """Return a list containing the edges of the given list of 3-tuples of points"""
     edges = []
@@ -1,6 +1,8 @@
 
 import sys
 import math
+from array import array
+import geometry
 from geometry import x,y
 
 def LOG( *args ):
@@ -17,7 +19,19 @@ def LOGN( *args ):
     LOG("\n")
 
 
-def load_points( stream ):
+def load_points( stream, pointset = False ):
+    """Return the list of (x,y) tuples read in the stream, or a geometry.PointSet if asked for."""
+    if pointset:
+        import numpy
+        # Read the coordinates in a flat array, without building a tuple for each point.
+        coords = array('d')
+        for line in stream:
+            if line.strip()[0] != "#":
+                p = [float(i) for i in line.split(",")]
+                assert(len(p)==2)
+                coords.extend( p )
+        return geometry.PointSet( numpy.frombuffer( coords, dtype=float ) )
+
     points = []
     for line in stream:
         if line.strip()[0] != "#":
@@ -73,11 +87,11 @@ def load_matrix( stream ):
 
 def write_matrix( mat, stream):
     for row in mat:
-        key = "%f,%f:" % row
+        key = "%f,%f:" % ( x(row),y(row) )
         line = key
         for k in mat[row]:
             val = mat[row][k]
-            line += "%f,%f=%f " % (k[0],k[1],val)
+            line += "%f,%f=%f " % (x(k),y(k),val)
         stream.write( line + "\n" )
 
 
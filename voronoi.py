@@ -8,8 +8,8 @@ import graph
 
 def nodes( triangles ):
     """Compute the locations of the centers of all the circumscribed circles of the given triangles"""
-    for triangle in triangles:
-        (cx,cy),r = triangulation.circumcircle(triangle)
+    centers,radii2,kinds = triangulation.circumcircles( triangles )
+    for cx,cy in centers.tolist():
         yield (cx,cy)
 
 
@@ -21,8 +21,38 @@ def edge_in( edge, edges ):
     return (n,m) in edges or (m,n) in edges
 
 
-def edges_neighbours( candidate, polygons ):
-    """Returns the set of candidates in polygons that have an edge in common with the given candidate."""
+def index_of( polygons ):
+    """Return two dictionaries, giving the positions of the polygons having a given edge and a given vertex.
+
+    Edges are undirected: both (n,m) and (m,n) are stored under the sorted key."""
+    edges = {}
+    vertices = {}
+    for i,polygon in enumerate(polygons):
+        for n,m in tour(list(polygon)):
+            edges.setdefault( (min(n,m),max(n,m)), [] ).append( i )
+        for vertex in polygon:
+            # Do not store twice a polygon having the same vertex twice.
+            at = vertices.setdefault( vertex, [] )
+            if not at or at[-1] != i:
+                at.append( i )
+    return edges,vertices
+
+
+def edges_neighbours( candidate, polygons, index = None ):
+    """Returns the set of candidates in polygons that have an edge in common with the given candidate.
+
+    If index (as computed by index_of) is given, the polygons are not all scanned."""
+    if index is not None:
+        edges,vertices = index
+        found = set()
+        for n,m in tour(list(candidate)):
+            found.update( edges.get( (min(n,m),max(n,m)), [] ) )
+        # Yield the polygons in the same order than when scanning them.
+        for i in sorted(found):
+            if polygons[i] != candidate:
+                yield polygons[i]
+        return
+
     for polygon in polygons:
         if polygon == candidate:
             continue
@@ -42,8 +72,20 @@ def edges_neighbours( candidate, polygons ):
                 yield polygon
                 break
 
-def vertices_neighbours( candidate, polygons ):
-    """Returns the set of candidates in polygon that have a vertex in common with the given candidate."""
+def vertices_neighbours( candidate, polygons, index = None ):
+    """Returns the set of candidates in polygon that have a vertex in common with the given candidate.
+
+    If index (as computed by index_of) is given, the polygons are not all scanned."""
+    if index is not None:
+        edges,vertices = index
+        found = set()
+        for vertex in candidate:
+            found.update( vertices.get( vertex, [] ) )
+        for i in sorted(found):
+            if polygons[i] != candidate:
+                yield polygons[i]
+        return
+
     for polygon in polygons:
         if polygon == candidate:
             continue
@@ -57,8 +99,12 @@ def vertices_neighbours( candidate, polygons ):
 
 
 
-def dual( triangles, neighborhood = edges_neighbours ):
-    """Compute the dual Voronoï graph of a triangulation."""
+def dual( triangles, neighborhood = edges_neighbours, index = None ):
+    """Compute the dual Voronoï graph of a triangulation.
+
+    The neighbours of each triangle are found with the index of its edges and vertices,
+    which is computed with index_of if not given.
+    The circumcircles of all the triangles are computed at once."""
     graph = {}
 
     def add_edge( current, neighbor ):
@@ -68,21 +114,23 @@ def dual( triangles, neighborhood = edges_neighbours ):
         else:
             graph[current] = [ neighbor ]
 
+    triangles = list(triangles)
+    if index is None:
+        index = index_of( triangles )
+
+    # Consider the center of the circumcircle as the node for each triangle.
+    centers,radii2,kinds = triangulation.circumcircles( triangles )
+    assert( triangulation.OBTUSE not in kinds )
+    node_of = dict( ( tuple(triangle), center ) for triangle,center in zip( triangles, map( tuple, centers.tolist() ) ) )
+
     for triangle in triangles:
         assert( len(triangle) == 3 )
         assert( not geometry.collinear(*triangle) )
-        assert( triangulation.is_acute(triangle) )
-        # Consider the center of the circumcircle as the node for this triangle.
-        current_node = triangulation.circumcircle(triangle)[0]
-        assert( len(current_node) == 2 )
-
-        for neighbor_triangle in neighborhood( triangle, triangles ):
-            assert( len(triangle) == 3 )
-            assert( not geometry.collinear(*neighbor_triangle) )
-            assert( triangulation.is_acute(neighbor_triangle) )
+        current_node = node_of[tuple(triangle)]
+
+        for neighbor_triangle in neighborhood( triangle, triangles, index ):
             # Consider the neighbor's center as nodes.
-            neighbor_node = triangulation.circumcircle(neighbor_triangle)[0]
-            assert( len(neighbor_node) == 2 )
+            neighbor_node = node_of[tuple(neighbor_triangle)]
 
             # Add edges between the current triangle's node and thoses of its neighbors.
             add_edge(  current_node, neighbor_node )
@@ -131,32 +179,98 @@ def merge_nodes( graph, n0, n1, n2 ):
 
 
 def merge_enclosed( graph, segments ):
-    """Merge nodes of the given graph that are on edges that do not intersects with the given segments."""
-    i=0
-    while i < len(graph.keys()):
-        node = graph.keys()[i]
-        j=0
-        altered = False
-        while j < len(graph[node]):
-            neighbour = graph[node][j]
+    """Merge nodes of the given graph that are on edges that do not intersects with the given segments.
+
+    Each edge is tested once and the nodes linked by edges without intersection are gathered in sets,
+    with a disjoint-set forest. Each set is then replaced by a single node, at the barycenter of its nodes,
+    which is the middle of the edge if there is only two of them."""
+    # Prepare the segments once, so as to test each edge only against the ones which boxes overlap its own.
+    segments = geometry.PreparedSegments( [ [ tuple(p) for p in seg ] for seg in segments ] )
+
+    # Each node points toward another node of its set, the root of a tree being the representative of the set.
+    parent = dict( (node,node) for node in graph )
+    size = dict( (node,1) for node in graph )
+
+    def find( node ):
+        while parent[node] != node:
+            # Path halving: make the node point to its grand-parent.
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union( n0, n1 ):
+        r0,r1 = find(n0),find(n1)
+        # Attach the smaller tree under the root of the larger one.
+        if size[r0] < size[r1]:
+            r0,r1 = r1,r0
+        parent[r1] = r0
+        size[r0] += size[r1]
+
+    # Each undirected edge is tested once, all at the same time.
+    edges = []
+    for node in graph:
+        for neighbour in graph[node]:
             assert( neighbour in graph )
-            edge = (node,neighbour)
+            if node < neighbour:
+                edges.append( (node,neighbour) )
+    crossed = segments.intersects_each( edges )
 
-            if not any( geometry.segment_intersection(edge,seg) for seg in segments ):
-                graph = merge_nodes( graph, edge[0], edge[1], geometry.middle(*edge) )
-                altered = True
-                LOG(".")
-                break
-            else:
-                j+=1
-                continue
+    for (node,neighbour),cross in zip( edges, crossed ):
+        if not cross and find(node) != find(neighbour):
+            union( node, neighbour )
+            LOG(".")
 
-        if altered:
-            i = 0
+    sets = {}
+    for node in graph:
+        sets.setdefault( find(node), [] ).append( node )
+
+    # The new location of the nodes.
+    merged = {}
+    for nodes in sets.values():
+        if len(nodes) == 1:
+            center = nodes[0]
+        elif len(nodes) == 2:
+            center = geometry.middle( *nodes )
         else:
-            i+=1
+            center = geometry.centroid( nodes )
+        for node in nodes:
+            merged[node] = center
 
-    return graph
+    return relink( graph, merged )
+
+
+def relink( graph, merged ):
+    """Return the graph where each node is replaced by its new location in the given dictionary,
+    if it has one, in a single pass over the edges."""
+    reduced = {}
+    for node in graph:
+        center = merged.get( node, node )
+        neighbours = reduced.setdefault( center, [] )
+        for neighbour in graph[node]:
+            # The new node cannot be linked to itself, nor twice to the same node.
+            n = merged.get( neighbour, neighbour )
+            if n != center and n not in neighbours:
+                neighbours.append( n )
+
+    return reduced
+
+
+def merge_pairs( graph, triangles ):
+    """Merge the nodes of the given graph that are the centers of consecutive pairs of triangles,
+    as the ones of a constrained triangulation of the Penrose tiling (see triangulation.delaunay_constrained)."""
+    assert( len(triangles) % 2 == 0 )
+    # The new location of the nodes.
+    merged = {}
+    for t0,t1 in zip( triangles[0::2], triangles[1::2] ):
+        n0 = triangulation.circumcircle(t0)[0]
+        n1 = triangulation.circumcircle(t1)[0]
+        # Nodes that are not in the dual graph, or that are already merged, cannot be merged.
+        if n0 in graph and n1 in graph and n0 != n1 and n0 not in merged and n1 not in merged:
+            assert( n1 in graph[n0] )
+            merged[n0] = merged[n1] = geometry.middle(n0,n1)
+            LOG(".")
+
+    return relink( graph, merged )
 
 
 if __name__ == "__main__":